@@ -8,6 +8,7 @@ from typing import List, Optional
 
 import mlflow
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from loguru import logger
 from pydantic import BaseModel
 
@@ -65,18 +66,8 @@ def get_best_runs(limit: int = 5):
         logger.error(f"Failed to query MLflow: {e}")
         return []
 
-# --- Endpoints ---
-
-@router.post("/chat")
-async def chat(request: ChatRequest):
-    """
-    General conversational endpoint for the Supervisor Agent.
-    Integrated with MLflow Experiment Tracking context.
-    """
-    analyst = get_market_analyst()
-    if not analyst:
-        raise HTTPException(status_code=503, detail="AI Service unavailable")
-
+def _build_chat_prompt(message: str) -> str:
+    """Supervisor Agent prompt, enriched with the best MLflow runs."""
     # Inject Best Runs context
     best_runs = get_best_runs(3)
     runs_context = ""
@@ -86,7 +77,7 @@ async def chat(request: ChatRequest):
             for r in best_runs
         ])
 
-    prompt = f"""
+    return f"""
     You are the 'Supervisor Agent' of a high-frequency quantitative hedge fund platform.
     Your user is an institutional portfolio manager.
     
@@ -95,16 +86,43 @@ async def chat(request: ChatRequest):
     Answer the following question or request concisely and professionally.
     If the user asks about strategy optimization (e.g. lowering drawdown), suggest specific techniques (volatility targeting, stop-losses, beta hedging).
     
-    User Query: "{request.message}"
+    User Query: "{message}"
     """
 
+# --- Endpoints ---
+
+@router.post("/chat")
+async def chat(request: ChatRequest):
+    """
+    General conversational endpoint for the Supervisor Agent.
+    Integrated with MLflow Experiment Tracking context.
+    """
+    analyst = get_market_analyst()
+    if not analyst:
+        raise HTTPException(status_code=503, detail="AI Service unavailable")
+
+    prompt = _build_chat_prompt(request.message)
+
     try:
         # Use conversational mode (json_mode=False)
-        response = analyst._call_llm(prompt, json_mode=False)
+        response = await analyst._acall_llm(prompt, json_mode=False)
         return {"response": response}
     except Exception as e:
         return {"response": f"I am currently offline. ({e})"}
 
+@router.post("/chat/stream")
+async def chat_stream(request: ChatRequest):
+    """
+    Streaming variant of /chat.
+    Tokens are forwarded as they are generated, so the UI can render immediately.
+    """
+    analyst = get_market_analyst()
+    if not analyst:
+        raise HTTPException(status_code=503, detail="AI Service unavailable")
+
+    prompt = _build_chat_prompt(request.message)
+    return StreamingResponse(analyst.astream_llm(prompt), media_type="text/plain")
+
 @router.post("/deploy_code")
 async def deploy_code(request: DeployCodeRequest):
     """
@@ -186,7 +204,7 @@ async def analyze_backtest(request: AnalyzeRequest):
     """
 
     try:
-        analysis = analyst._call_llm(prompt)
+        analysis = await analyst._acall_llm(prompt)
 
         # Log analysis as artifact to MLflow
         with mlflow.start_run(run_id=request.run_id):
@@ -313,7 +331,7 @@ async def generate_strategy(request: StrategyRequest):
     """
 
     try:
-        config = analyst._call_llm(prompt)
+        config = await analyst._acall_llm(prompt)
         return config
     except Exception as e:
         logger.error(f"Strategy generation failed: {e}")
@@ -343,7 +361,7 @@ async def generate_code(request: CodeGenRequest):
     """
 
     try:
-        result = analyst._call_llm(prompt)
+        result = await analyst._acall_llm(prompt)
         return result
     except Exception as e:
         logger.error(f"Code generation failed: {e}")
@@ -70,6 +70,14 @@ def get_recent_orders(limit: int = 50):
     app = get_omega_app()
     return app.get_recent_orders(limit=limit)
 
+@router.get("/snapshot")
+async def get_broker_snapshot(limit: int = 50):
+    """Account, positions and orders in one round trip for the dashboard."""
+    app = get_omega_app()
+    if not app.is_connected():
+        return {"account": {}, "positions": [], "open_orders": [], "recent_orders": []}
+    return await app.broker.snapshot(recent_limit=limit)
+
 @router.websocket("/ws/ticks")
 async def websocket_tick_stream(websocket: WebSocket):
     """
@@ -14,6 +14,7 @@ class AssetRegistry:
 
         self.config_path = config_path
         self.assets: Dict[str, Any] = {}
+        self._asset_classes: Dict[str, str] = {}
         self.load()
 
     def load(self):
@@ -26,6 +27,10 @@ class AssetRegistry:
         except Exception as e:
             logger.error(f"Failed to load Asset Registry from {self.config_path}: {e}")
             self.assets = {}
+        # Flattened once per load so the per-order/per-position lookup is a single dict get
+        self._asset_classes = {
+            symbol: (cfg or {}).get("asset_class", "UNKNOWN") for symbol, cfg in self.assets.items()
+        }
 
     def get_asset(self, symbol: str) -> Optional[Dict[str, Any]]:
         """Retrieve config for a specific symbol."""
@@ -45,8 +50,7 @@ class AssetRegistry:
 
     def get_asset_class(self, symbol: str) -> str:
         """Get the asset class (EQUITY, FX, etc)."""
-        asset = self.get_asset(symbol)
-        return asset.get("asset_class", "UNKNOWN") if asset else "UNKNOWN"
+        return self._asset_classes.get(symbol, "UNKNOWN")
 
 # Singleton instance
 _registry = None
@@ -6,6 +6,7 @@ from fastapi.middleware.cors import CORSMiddleware
 
 from api.routers.data import get_qs_client
 from api.routers.main_router import api_router
+from omega.ai_service import close_aiohttp_sessions
 from omega.singleton import get_omega_app
 
 # Initialize logging
@@ -43,6 +44,9 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"Error during shutdown: {e}")
 
+    # Release the pooled LLM connections held by this loop's aiohttp session
+    await close_aiohttp_sessions()
+
 app = FastAPI(title="QuantHedgeFund API", lifespan=lifespan)
 
 # Configure CORS
@@ -1,10 +1,173 @@
-import json
+import asyncio
+import hashlib
 import os
-from typing import Any, Dict, Optional
+import random
+import ssl
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, Iterator, Optional, Tuple
 
-from groq import Groq
+import certifi
+import httpx
+import orjson
+from cachetools import TTLCache
+from groq import AsyncGroq, Groq
 from loguru import logger
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
+
+try:
+    import aiohttp
+    AIOHTTP_AVAILABLE = True
+except ImportError:
+    AIOHTTP_AVAILABLE = False
+
+# Shared transport: building an SSL context reads the CA bundle from disk (~10 ms),
+# so every provider client reuses one context and one pooled keep-alive HTTP client.
+_SSL_CTX = ssl.create_default_context(cafile=certifi.where())
+_HTTP_LIMITS = httpx.Limits(max_connections=100, max_keepalive_connections=20)
+_HTTPX = httpx.Client(verify=_SSL_CTX, timeout=30.0, limits=_HTTP_LIMITS)
+
+
+def _async_http_client() -> httpx.AsyncClient:
+    """Async pool on the shared SSL context (pools are loop-bound: one per event loop)."""
+    return httpx.AsyncClient(verify=_SSL_CTX, timeout=30.0, limits=_HTTP_LIMITS)
+
+
+# Bound every LLM call; the SDKs retry transient errors with jittered backoff
+LLM_TIMEOUT = 15.0
+LLM_MAX_RETRIES = 2
+
+
+@lru_cache(maxsize=4)
+def _openai_client(api_key: str) -> OpenAI:
+    """Sync clients are shared per key, so force_refresh only re-reads config."""
+    return OpenAI(api_key=api_key, http_client=_HTTPX, timeout=LLM_TIMEOUT, max_retries=LLM_MAX_RETRIES)
+
+
+@lru_cache(maxsize=4)
+def _groq_client(api_key: str) -> Groq:
+    return Groq(api_key=api_key, http_client=_HTTPX, timeout=LLM_TIMEOUT, max_retries=LLM_MAX_RETRIES)
+
+
+# Async clients per (event loop, provider, key): their httpx pool is loop-bound, so each loop
+# keeps one client and force_refresh reuses it instead of redoing the TLS handshake
+_ASYNC_CLIENTS: Dict[Tuple[asyncio.AbstractEventLoop, str, str], Any] = {}
+_ASYNC_CLIENT_TYPES = {"openai": AsyncOpenAI, "groq": AsyncGroq}
+
+
+def _async_llm_client(provider: str, api_key: str) -> Any:
+    """Async SDK client for the running loop, created on first use in that loop."""
+    key = (asyncio.get_running_loop(), provider, api_key)
+    client = _ASYNC_CLIENTS.get(key)
+    if client is None:
+        # Clients of loops that have ended can never be used again
+        for stale in [k for k in list(_ASYNC_CLIENTS) if k[0].is_closed()]:
+            _ASYNC_CLIENTS.pop(stale, None)
+        client = _ASYNC_CLIENTS[key] = _ASYNC_CLIENT_TYPES[provider](
+            api_key=api_key, http_client=_async_http_client(), timeout=LLM_TIMEOUT, max_retries=LLM_MAX_RETRIES
+        )
+    return client
+
+
+class _TransientHTTPError(RuntimeError):
+    """Provider answered 429/5xx: safe to retry."""
+
+
+# OpenAI-compatible REST roots used by the raw aiohttp hot path
+PROVIDER_BASE_URLS = {
+    "openai": "https://api.openai.com/v1",
+    "groq": "https://api.groq.com/openai/v1",
+}
+
+# One aiohttp session per event loop: sessions must be used on the loop that created them
+_AIOHTTP_SESSIONS: Dict[asyncio.AbstractEventLoop, "aiohttp.ClientSession"] = {}
+
+
+async def _aiohttp_session() -> "aiohttp.ClientSession":
+    """Lazily create the running loop's aiohttp session, closing those of loops that have ended."""
+    loop = asyncio.get_running_loop()
+    session = _AIOHTTP_SESSIONS.get(loop)
+    if session is not None and not session.closed:
+        return session
+
+    connector = aiohttp.TCPConnector(limit=200, ttl_dns_cache=300, ssl=_SSL_CTX)
+    session = _AIOHTTP_SESSIONS[loop] = aiohttp.ClientSession(connector=connector)
+
+    # A loop per call (asyncio.run, per-test loops) leaves its session behind; its loop is
+    # closed, so closing it here attempts no I/O but releases the connector without a warning
+    for stale_loop in [l for l in list(_AIOHTTP_SESSIONS) if l.is_closed()]:
+        stale = _AIOHTTP_SESSIONS.pop(stale_loop, None)
+        if stale is not None and not stale.closed:
+            await stale.close()
+    return session
+
+
+async def close_aiohttp_sessions() -> None:
+    """Close the running loop's aiohttp session (app shutdown hook)."""
+    session = _AIOHTTP_SESSIONS.pop(asyncio.get_running_loop(), None)
+    if session is not None and not session.closed:
+        await session.close()
+
+
+# Response cache shared across analyst instances (survives force_refresh).
+# Keyed by (feature, model, symbol, snapshot hash); entries expire after 30s.
+_RESPONSE_CACHE: TTLCache = TTLCache(maxsize=4096, ttl=30)
+_CACHE_LOCK = threading.RLock()
+
+# Snapshot fields that change on every poll without changing the analysis
+_VOLATILE_SNAPSHOT_KEYS = frozenset({"timestamp", "ts", "last_update"})
+
+
+# Fields the feature prompts actually reason about; everything else is prefill noise
+_PROMPT_SNAPSHOT_FIELDS = frozenset({
+    "symbol", "price", "last", "bid", "ask", "spread", "spread_pct",
+    "vwap", "price_vs_vwap_pct", "atr", "atr_pct", "range_pct",
+    "volume", "rvol", "volume_zscore", "volatility", "session",
+})
+
+
+def _compact_snapshot(snapshot: Dict[str, Any]) -> Dict[str, Any]:
+    """Drop raw histories and unreferenced keys to keep prompt prefill short."""
+    scalars = {k: v for k, v in snapshot.items() if not isinstance(v, (list, tuple, dict))}
+    compact = {k: v for k, v in scalars.items() if k in _PROMPT_SNAPSHOT_FIELDS}
+    return compact or scalars
+
+
+def _dumps(obj: Any) -> str:
+    """Compact JSON for prompts; numpy scalars from pandas/polars serialize natively."""
+    return orjson.dumps(obj, default=str, option=orjson.OPT_SERIALIZE_NUMPY).decode()
+
+
+def _snapshot_hash(snapshot: Dict[str, Any]) -> str:
+    """Stable hash of a snapshot, with floats quantized to reduce key churn."""
+    quantized = {
+        k: round(v, 4) if isinstance(v, float) else v
+        for k, v in snapshot.items()
+        if k not in _VOLATILE_SNAPSHOT_KEYS
+    }
+    payload = orjson.dumps(quantized, default=str, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_SORT_KEYS)
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+
+# Shared system message: identical bytes on every call so providers cache it
+_SYSTEM_RULES = (
+    "You are a specialized trading AI producing governance-safe market analysis.\n"
+    "Rules:\n"
+    "- Do NOT predict future prices or use price prediction language\n"
+    "- Base every statement only on the data provided"
+)
+_JSON_RULE = "\n- Output strictly valid JSON"
+
+
+@dataclass(frozen=True)
+class HedgePolicy:
+    """
+    Hedged requests: the secondary provider is only fired if the primary has
+    not answered within `delay_ms`, so the common case costs a single call.
+    """
+    enabled: bool = True
+    delay_ms: int = 200
 
 
 class MarketAnalyst:
@@ -13,7 +176,76 @@ class MarketAnalyst:
     Transforms structured market data into governance-safe trading insights.
     """
 
-    def __init__(self, api_key: Optional[str] = None):
+    # Output token caps per feature; each returns a handful of JSON fields
+    FEATURE_TOKEN_BUDGETS = {"summary": 128, "regime": 96, "risk": 96, "levels": 160}
+
+    # Prompt templates are built once. Each starts with byte-identical feature
+    # instructions and ends with the symbol and snapshot, so provider prefix
+    # caches hit across symbols and snapshots.
+    _TPL_SUMMARY = (
+        "Analyze the market snapshot and produce:\n"
+        "1. A 1-2 sentence market summary\n"
+        "2. Bias: BULLISH / BEARISH / NEUTRAL\n"
+        "3. Confidence score (0-100)\n"
+        "Focus on momentum, volume, and context.\n\n"
+        "Symbol: {symbol}\n"
+        "Snapshot: {snapshot_json}"
+    )
+    _TPL_REGIME = (
+        "Classify the current market regime.\n"
+        "Choose ONE: [TREND, RANGE, BREAKOUT, HIGH_VOLATILITY, LOW_LIQUIDITY]\n"
+        "Return JSON with: regime, confidence, reason.\n\n"
+        "Symbol: {symbol}\n"
+        "Snapshot: {snapshot_json}"
+    )
+    _TPL_RISK = (
+        "Evaluate trade safety.\n"
+        "Consider: Spread, Liquidity, Volatility, Session.\n"
+        "Return JSON with:\n"
+        "- risk_level: LOW / MEDIUM / HIGH\n"
+        "- explanation: 1 sentence reason\n\n"
+        "Symbol: {symbol}\n"
+        "Snapshot: {snapshot_json}"
+    )
+    _TPL_LEVELS = (
+        "Suggest stop-loss and take-profit levels.\n"
+        "Rules:\n"
+        "- Use ATR, VWAP distance, and volatility\n"
+        "- Risk-reward between 1:1.5 and 1:3\n\n"
+        "Return JSON with: stop_loss, take_profit, risk_reward, reason\n\n"
+        "Symbol: {symbol}\n"
+        "Snapshot: {snapshot_json}"
+    )
+    PROMPT_TEMPLATES = {
+        "summary": _TPL_SUMMARY,
+        "regime": _TPL_REGIME,
+        "risk": _TPL_RISK,
+        "levels": _TPL_LEVELS,
+    }
+
+    # Multi-symbol variants: one call answers for up to BATCH_SIZE symbols
+    BATCH_SIZE = 20
+    _TPL_REGIME_BATCH = (
+        "Classify the current market regime for each symbol.\n"
+        "Choose ONE per symbol: [TREND, RANGE, BREAKOUT, HIGH_VOLATILITY, LOW_LIQUIDITY]\n"
+        "Return one JSON object keyed by symbol; each value has: regime, confidence, reason.\n\n"
+        "Symbols: {symbol}\n"
+        "Snapshots: {snapshot_json}"
+    )
+    _TPL_RISK_BATCH = (
+        "Evaluate trade safety for each symbol.\n"
+        "Consider: Spread, Liquidity, Volatility, Session.\n"
+        "Return one JSON object keyed by symbol; each value has:\n"
+        "- risk_level: LOW / MEDIUM / HIGH\n"
+        "- explanation: 1 sentence reason\n\n"
+        "Symbols: {symbol}\n"
+        "Snapshots: {snapshot_json}"
+    )
+    BATCH_TEMPLATES = {"regime": _TPL_REGIME_BATCH, "risk": _TPL_RISK_BATCH}
+    # Keys a per-symbol batch answer must carry to be accepted
+    FEATURE_SCHEMAS = {"regime": ("regime", "confidence", "reason"), "risk": ("risk_level", "explanation")}
+
+    def __init__(self, api_key: Optional[str] = None, hedge: HedgePolicy = HedgePolicy()):
         from pathlib import Path
 
         from dotenv import find_dotenv, load_dotenv
@@ -27,114 +259,477 @@ class MarketAnalyst:
         self.groq_key = os.getenv("GROQ_API_KEY") or os.getenv("GROK_API_KEY")
 
         self.provider = "none"
+        self.api_key = ""
         self.client = None
         self.model = ""
+        self.fallback: Optional[Dict[str, Any]] = None  # Secondary provider route
+        self.hedge = hedge
+        self._fast_stats = {"calls": 0, "hits": 0}  # Rule pre-classifier short-circuit rate
+        # Opt-in: OpenAI and Groq cache prefixes implicitly and may reject the extra field
+        self.cache_hints = os.getenv("AI_PROMPT_CACHE_HINTS", "").lower() in ("1", "true", "yes")
 
         # Priority 1: OpenAI (GPT-4o)
         if self.openai_key:
             self.provider = "openai"
-            self.client = OpenAI(api_key=self.openai_key)
+            self.api_key = self.openai_key
+            self.client = _openai_client(self.openai_key)
             self.model = "gpt-4o" # or gpt-4-turbo
             logger.info(f"🧠 Initializing AI Service with OpenAI ({self.model})")
 
         # Priority 2: Groq (Llama 3)
         elif self.groq_key:
             self.provider = "groq"
-            self.client = Groq(api_key=self.groq_key)
+            self.api_key = self.groq_key
+            self.client = _groq_client(self.groq_key)
             self.model = "llama-3.3-70b-versatile"
             logger.info(f"🧠 Initializing AI Service with Groq ({self.model})")
 
         else:
              logger.error("❌ No AI API Key (OpenAI or Groq) found!")
 
+        # With both keys, Groq backs up OpenAI to cut tail latency
+        if self.provider == "openai" and self.groq_key:
+            self.fallback = {
+                "provider": "groq",
+                "api_key": self.groq_key,
+                "model": "llama-3.3-70b-versatile",
+                "client": _groq_client(self.groq_key),
+            }
+            logger.info(f"🧠 Groq fallback enabled (hedge after {self.hedge.delay_ms}ms)")
+
+    @property
+    def aclient(self) -> Any:
+        """Async twin of `client` for the running event loop (shared across instances)."""
+        return _async_llm_client(self.provider, self.api_key) if self.client else None
+
     def generate_market_summary(self, symbol: str, snapshot: Dict[str, Any]) -> Dict[str, Any]:
         """Feature 1: AI Market Summary"""
-        prompt = f"""
-        You are a professional trading assistant.
-        Analyze this market snapshot and produce:
-        1. A 1-2 sentence market summary
-        2. Bias: BULLISH / BEARISH / NEUTRAL
-        3. Confidence score (0-100)
-
-        Rules:
-        - Do NOT predict future prices
-        - Focus on momentum, volume, and context
-        
-        Snapshot: {json.dumps(snapshot)}
-        """
-        return self._call_llm(prompt)
+        return self._cached("summary", symbol, snapshot)
 
     def detect_regime(self, symbol: str, snapshot: Dict[str, Any]) -> Dict[str, Any]:
         """Feature 2: AI Market Regime Detection"""
-        prompt = f"""
-        Classify the current market regime for {symbol}.
-        Choose ONE: [TREND, RANGE, BREAKOUT, HIGH_VOLATILITY, LOW_LIQUIDITY]
-        Return JSON with: regime, confidence, reason.
-        
-        Snapshot: {json.dumps(snapshot)}
-        """
-        return self._call_llm(prompt)
+        fast = self._fast_path("regime", snapshot)
+        return fast if fast else self._cached("regime", symbol, snapshot)
 
     def check_risk_guardrail(self, symbol: str, snapshot: Dict[str, Any]) -> Dict[str, Any]:
         """Feature 3: AI Risk Guardrail"""
-        prompt = f"""
-        Evaluate trade safety for {symbol}.
-        Consider: Spread, Liquidity, Volatility, Session.
-        Return JSON with: 
-        - risk_level: LOW / MEDIUM / HIGH
-        - explanation: 1 sentence reason
-        
-        Snapshot: {json.dumps(snapshot)}
-        """
-        return self._call_llm(prompt)
+        fast = self._fast_path("risk", snapshot)
+        return fast if fast else self._cached("risk", symbol, snapshot)
 
     def suggest_trade_levels(self, symbol: str, snapshot: Dict[str, Any]) -> Dict[str, Any]:
         """Feature 4: AI Stop-Loss & Take-Profit"""
-        prompt = f"""
-        Suggest stop-loss and take-profit levels for {symbol}.
-        Rules:
-        - Use ATR, VWAP distance, and volatility
-        - Risk-reward between 1:1.5 and 1:3
-        - No price prediction language
-        
-        Return JSON with: stop_loss, take_profit, risk_reward, reason
-        
-        Snapshot: {json.dumps(snapshot)}
+        return self._cached("levels", symbol, snapshot)
+
+    async def analyze_all(self, symbol: str, snapshot: Dict[str, Any]) -> Dict[str, Any]:
         """
-        return self._call_llm(prompt)
+        Run all four features concurrently.
+        Wall time is the slowest single call instead of the sum of all four.
+        Features already in the response cache are not re-requested.
+        """
+        snap_hash = _snapshot_hash(snapshot)
+        keys = {name: (name, self.model, symbol, snap_hash) for name in self.PROMPT_TEMPLATES}
+        results = {name: self._cache_get(keys[name]) for name in self.PROMPT_TEMPLATES}
+        for name in ("regime", "risk"):
+            if results[name] is None:
+                results[name] = self._fast_path(name, snapshot)
+        missing = [name for name, res in results.items() if res is None]
+
+        # Serialize once and reuse across every feature prompt
+        snapshot_json = _dumps(_compact_snapshot(snapshot)) if missing else ""
+        fetched = await asyncio.gather(
+            *(
+                self._acall_llm(
+                    self._make_prompt(self.PROMPT_TEMPLATES[name], symbol, snapshot_json),
+                    max_tokens=self.FEATURE_TOKEN_BUDGETS[name]
+                )
+                for name in missing
+            ),
+            return_exceptions=True
+        )
+        for name, res in zip(missing, fetched):
+            if isinstance(res, BaseException):
+                res = {"error": str(res)}
+            else:
+                self._cache_put(keys[name], res)
+            results[name] = res
+        return results
+
+    # =====================
+    # Multi-Symbol Batches
+    # =====================
+
+    async def batch_detect_regime(self, snapshots: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """Feature 2 across many symbols, sharing one LLM call per BATCH_SIZE symbols."""
+        return await self._abatch("regime", snapshots)
+
+    async def batch_check_risk_guardrail(self, snapshots: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        """Feature 3 across many symbols, sharing one LLM call per BATCH_SIZE symbols."""
+        return await self._abatch("risk", snapshots)
+
+    async def _abatch(self, feature: str, snapshots: Dict[str, Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+        keys = {sym: self._cache_key(feature, sym, snap) for sym, snap in snapshots.items()}
+        results = {}
+        for sym, snap in snapshots.items():
+            results[sym] = self._cache_get(keys[sym]) or self._fast_path(feature, snap)
+        missing = [sym for sym, res in results.items() if res is None]
+
+        chunks = [missing[i:i + self.BATCH_SIZE] for i in range(0, len(missing), self.BATCH_SIZE)]
+        answers = await asyncio.gather(
+            *(self._acall_batch(feature, chunk, snapshots) for chunk in chunks),
+            return_exceptions=True
+        )
 
-    def _call_llm(self, user_prompt: str, json_mode: bool = True) -> Any:
+        retry = []
+        for chunk, answer in zip(chunks, answers):
+            if isinstance(answer, BaseException) or not isinstance(answer, dict):
+                answer = {}
+            for sym in chunk:
+                res = answer.get(sym)
+                if self._valid_answer(feature, res):
+                    results[sym] = res
+                    self._cache_put(keys[sym], res)
+                else:
+                    retry.append(sym)
+
+        # Schema misses fall back to a single-symbol call for that symbol only
+        if retry:
+            logger.warning(f"Batch {feature} incomplete for {len(retry)} symbol(s), retrying individually")
+            singles = await asyncio.gather(
+                *(
+                    self._acall_llm(
+                        self._make_prompt(self.PROMPT_TEMPLATES[feature], sym, _dumps(_compact_snapshot(snapshots[sym]))),
+                        max_tokens=self.FEATURE_TOKEN_BUDGETS[feature]
+                    )
+                    for sym in retry
+                ),
+                return_exceptions=True
+            )
+            for sym, res in zip(retry, singles):
+                if isinstance(res, BaseException):
+                    res = {"error": str(res)}
+                else:
+                    self._cache_put(keys[sym], res)
+                results[sym] = res
+        return results
+
+    async def _acall_batch(self, feature: str, symbols: list, snapshots: Dict[str, Dict[str, Any]]) -> Any:
+        snapshots_json = _dumps({sym: _compact_snapshot(snapshots[sym]) for sym in symbols})
+        prompt = self._make_prompt(self.BATCH_TEMPLATES[feature], ", ".join(symbols), snapshots_json)
+        return await self._acall_llm(prompt, max_tokens=self.FEATURE_TOKEN_BUDGETS[feature] * len(symbols))
+
+    def _valid_answer(self, feature: str, result: Any) -> bool:
+        return isinstance(result, dict) and all(k in result for k in self.FEATURE_SCHEMAS[feature])
+
+    # =====================
+    # Rule-Based Pre-Classifiers
+    # =====================
+
+    def _fast_path(self, feature: str, snapshot: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Answer obvious regime/risk cases from the numbers; None defers to the LLM."""
+        classify = self._fast_regime if feature == "regime" else self._fast_risk
+        result = classify(snapshot)
+
+        self._fast_stats["calls"] += 1
+        if result:
+            self._fast_stats["hits"] += 1
+        logger.debug(
+            f"⚡ Rule pre-classifier: {self._fast_stats['hits']}/{self._fast_stats['calls']} calls short-circuited"
+        )
+        return result
+
+    @staticmethod
+    def _vol_pct(snapshot: Dict[str, Any]) -> Optional[float]:
+        """ATR as % of price, falling back to the raw volatility figure scaled by price."""
+        if snapshot.get("atr_pct") is not None:
+            return float(snapshot["atr_pct"])
+        price, vol = snapshot.get("price"), snapshot.get("volatility")
+        if price and vol is not None:
+            return float(vol) / float(price) * 100
+        return None
+
+    @staticmethod
+    def _fast_regime(snapshot: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        rvol = snapshot.get("rvol")
+        spread_pct = snapshot.get("spread_pct")
+        vol_pct = MarketAnalyst._vol_pct(snapshot)
+        range_pct = snapshot.get("range_pct")
+        zscore = snapshot.get("volume_zscore")
+        vwap_dist = snapshot.get("price_vs_vwap_pct")
+
+        if (rvol is not None and rvol < 0.3) or (spread_pct is not None and spread_pct >= 0.5):
+            return {"regime": "LOW_LIQUIDITY", "confidence": 85, "reason": "Rule-based: thin volume or wide spread."}
+        if (vol_pct is not None and vol_pct >= 3.0) or (range_pct is not None and range_pct >= 5.0):
+            return {"regime": "HIGH_VOLATILITY", "confidence": 80, "reason": "Rule-based: ATR/range far above normal."}
+        surge = (zscore is not None and zscore >= 3.0) or (rvol is not None and rvol >= 3.0)
+        if surge and vwap_dist is not None and abs(vwap_dist) >= 1.0:
+            return {"regime": "BREAKOUT", "confidence": 75, "reason": "Rule-based: volume surge with price away from VWAP."}
+        return None
+
+    @staticmethod
+    def _fast_risk(snapshot: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        rvol = snapshot.get("rvol")
+        spread_pct = snapshot.get("spread_pct")
+        vol_pct = MarketAnalyst._vol_pct(snapshot)
+
+        if spread_pct is not None and spread_pct >= 0.5:
+            return {"risk_level": "HIGH", "explanation": "Rule-based: bid-ask spread is too wide to trade safely."}
+        if rvol is not None and rvol < 0.3:
+            return {"risk_level": "HIGH", "explanation": "Rule-based: liquidity is far below normal."}
+        if vol_pct is not None and vol_pct >= 5.0:
+            return {"risk_level": "HIGH", "explanation": "Rule-based: volatility is extreme relative to price."}
+        if (
+            spread_pct is not None and spread_pct <= 0.05
+            and rvol is not None and 0.8 <= rvol <= 2.0
+            and vol_pct is not None and vol_pct <= 1.0
+        ):
+            return {"risk_level": "LOW", "explanation": "Rule-based: tight spread, normal volume and calm volatility."}
+        return None
+
+    # =====================
+    # Response Cache
+    # =====================
+
+    def _cache_key(self, feature: str, symbol: str, snapshot: Dict[str, Any]) -> Tuple[str, str, str, str]:
+        return (feature, self.model, symbol, _snapshot_hash(snapshot))
+
+    def _cache_get(self, key: Tuple[str, str, str, str]) -> Optional[Dict[str, Any]]:
+        with _CACHE_LOCK:
+            return _RESPONSE_CACHE.get(key)
+
+    def _cache_put(self, key: Tuple[str, str, str, str], result: Any) -> None:
+        """Store successful responses only; errors must be retried on the next call."""
+        if isinstance(result, dict) and "error" not in result:
+            with _CACHE_LOCK:
+                _RESPONSE_CACHE[key] = result
+
+    def _cached(self, feature: str, symbol: str, snapshot: Dict[str, Any]) -> Dict[str, Any]:
+        """Serve a feature from the TTL cache, calling the LLM only on a miss."""
+        key = self._cache_key(feature, symbol, snapshot)
+        hit = self._cache_get(key)
+        if hit is not None:
+            return hit
+
+        prompt = self._make_prompt(
+            self.PROMPT_TEMPLATES[feature], symbol, _dumps(_compact_snapshot(snapshot))
+        )
+        result = self._call_llm(prompt, max_tokens=self.FEATURE_TOKEN_BUDGETS[feature])
+        self._cache_put(key, result)
+        return result
+
+    # =====================
+    # Prompt Templates
+    # =====================
+
+    def _make_prompt(self, tpl: str, symbol: str, snapshot_json: str) -> str:
+        return tpl.format_map({"symbol": symbol, "snapshot_json": snapshot_json})
+
+    # =====================
+    # LLM Transport
+    # =====================
+
+    def _build_params(
+        self, user_prompt: str, json_mode: bool, max_tokens: int = 1024, model: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """Chat completion params shared by the sync and async paths."""
+        # Adjust system prompt and params based on mode
+        sys_msg = _SYSTEM_RULES + _JSON_RULE if json_mode else _SYSTEM_RULES
+        if self.cache_hints:
+            # Explicit cache breakpoint for providers that honour `cache_control`
+            sys_msg = [{"type": "text", "text": sys_msg, "cache_control": {"type": "ephemeral"}}]
+        params = {
+            "model": model or self.model,
+            "messages": [
+                {"role": "system", "content": sys_msg},
+                {"role": "user", "content": user_prompt}
+            ],
+            "temperature": 0.4,
+            "max_tokens": max_tokens
+        }
+
+        if json_mode:
+            params["response_format"] = {"type": "json_object"}
+        return params
+
+    def _primary_route(self) -> Dict[str, Any]:
+        return {
+            "provider": self.provider,
+            "api_key": self.api_key,
+            "model": self.model,
+            "client": self.client,
+        }
+
+    def _call_llm(self, user_prompt: str, json_mode: bool = True, max_tokens: int = 1024) -> Any:
         """Internal helper to call LLM (OpenAI or Groq) safely"""
         if not self.client:
             return {"error": "AI Service Disabled"} if json_mode else "AI Service Disabled"
 
-        try:
-            # Adjust system prompt and params based on mode
-            sys_msg = "You are a specialized trading AI. Output strictly valid JSON." if json_mode else "You are a specialized trading AI."
-            params = {
-                "model": self.model,
-                "messages": [
-                    {"role": "system", "content": sys_msg},
-                    {"role": "user", "content": user_prompt}
-                ],
-                "temperature": 0.4,
-                "max_tokens": 1024
-            }
+        routes = [self._primary_route()] + ([self.fallback] if self.fallback else [])
+        for route in routes:
+            try:
+                params = self._build_params(user_prompt, json_mode, max_tokens, route["model"])
+                response = route["client"].chat.completions.create(**params)
+                content = response.choices[0].message.content
 
-            if json_mode:
-                params["response_format"] = {"type": "json_object"}
+                if json_mode:
+                    return orjson.loads(content)
+                return content
 
-            response = self.client.chat.completions.create(**params)
-            content = response.choices[0].message.content
+            except Exception as e:
+                error = e
+                logger.error(f"LLM Call Failed ({route['provider']}): {e}")
+        return {"error": str(error)} if json_mode else f"Error: {error}"
+
+    async def _acall_llm(self, user_prompt: str, json_mode: bool = True, max_tokens: int = 1024) -> Any:
+        """Non-blocking twin of `_call_llm` for use inside an event loop."""
+        if not self.client:
+            return {"error": "AI Service Disabled"} if json_mode else "AI Service Disabled"
 
+        try:
+            content = await self._ahedged_complete(user_prompt, json_mode, max_tokens)
             if json_mode:
-                return json.loads(content)
+                return orjson.loads(content)
             return content
 
         except Exception as e:
-            logger.error(f"LLM Call Failed ({self.provider}): {e}")
+            logger.error(f"Async LLM Call Failed ({self.provider}): {e}")
             return {"error": str(e)} if json_mode else f"Error: {e}"
 
+    async def _ahedged_complete(self, user_prompt: str, json_mode: bool, max_tokens: int) -> str:
+        """
+        Race the primary against the fallback provider.
+        The fallback starts once the primary is slower than the hedge delay or
+        fails; the first successful answer wins and the other call is cancelled.
+        """
+        def start(route: Dict[str, Any]) -> asyncio.Task:
+            params = self._build_params(user_prompt, json_mode, max_tokens, route["model"])
+            return asyncio.ensure_future(self._acomplete(route, params))
+
+        pending = {start(self._primary_route())}
+        if not (self.fallback and self.hedge.enabled):
+            return await pending.pop()
+
+        try:
+            done, pending = await asyncio.wait(pending, timeout=self.hedge.delay_ms / 1000)
+            for task in done:
+                if task.exception() is None:
+                    return task.result()
+                logger.warning(f"LLM primary failed, using {self.fallback['provider']}: {task.exception()}")
+            pending.add(start(self.fallback))
+
+            error: Optional[BaseException] = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in pending:
+                task.cancel()
+
+    async def _acomplete(self, route: Dict[str, Any], params: Dict[str, Any]) -> str:
+        if AIOHTTP_AVAILABLE:
+            return await self._apost_completion(params, route["provider"], route["api_key"])
+        response = await _async_llm_client(route["provider"], route["api_key"]).chat.completions.create(**params)
+        return response.choices[0].message.content
+
+    async def _apost_completion(
+        self, params: Dict[str, Any], provider: Optional[str] = None, api_key: Optional[str] = None
+    ) -> str:
+        """
+        Hot path: raw POST to /chat/completions on the shared aiohttp session.
+        Bypasses the SDK request/response model layers; the SDK client remains
+        the fallback when aiohttp is not installed and for streaming.
+        Transient failures (timeouts, resets, 429/5xx) are retried with jittered
+        exponential backoff, matching what the SDK clients do.
+        """
+        url = f"{PROVIDER_BASE_URLS[provider or self.provider]}/chat/completions"
+        headers = {"Authorization": f"Bearer {api_key or self.api_key}"}
+        timeout = aiohttp.ClientTimeout(total=LLM_TIMEOUT)
+
+        for attempt in range(LLM_MAX_RETRIES + 1):
+            try:
+                session = await _aiohttp_session()
+                async with session.post(url, json=params, headers=headers, timeout=timeout) as resp:
+                    body = await resp.read()
+                    if resp.status == 429 or resp.status >= 500:
+                        raise _TransientHTTPError(f"HTTP {resp.status}: {body[:200].decode(errors='replace')}")
+                    if resp.status >= 400:
+                        raise RuntimeError(f"HTTP {resp.status}: {body[:200].decode(errors='replace')}")
+                    return orjson.loads(body)["choices"][0]["message"]["content"]
+            except (_TransientHTTPError, aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                if attempt == LLM_MAX_RETRIES:
+                    logger.error(f"LLM POST gave up after {attempt + 1} attempts: {e}")
+                    raise
+                # Full jitter: uniform in [0, 0.3 * 2^attempt], capped at 4s
+                await asyncio.sleep(random.uniform(0, min(4.0, 0.3 * 2 ** attempt)))
+
+    # =====================
+    # Streaming
+    # =====================
+
+    def _build_stream_params(self, user_prompt: str, json_mode: bool) -> Dict[str, Any]:
+        """
+        Streaming variant of `_build_params`.
+        Some providers reject `response_format` together with `stream`, so JSON
+        is enforced by the system prompt alone when streaming.
+        """
+        params = self._build_params(user_prompt, json_mode)
+        params.pop("response_format", None)
+        params["stream"] = True
+        return params
+
+    def stream_llm(self, user_prompt: str, json_mode: bool = False) -> Iterator[str]:
+        """Yield completion text as it arrives, so the UI can render before the last token."""
+        if not self.client:
+            yield "AI Service Disabled"
+            return
+
+        try:
+            with self.client.chat.completions.create(**self._build_stream_params(user_prompt, json_mode)) as stream:
+                for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+        except Exception as e:
+            logger.error(f"LLM Stream Failed ({self.provider}): {e}")
+            yield f"Error: {e}"
+
+    async def astream_llm(self, user_prompt: str, json_mode: bool = False) -> AsyncIterator[str]:
+        """Async generator twin of `stream_llm` (suitable for FastAPI StreamingResponse)."""
+        if not self.aclient:
+            yield "AI Service Disabled"
+            return
+
+        try:
+            stream = await self.aclient.chat.completions.create(**self._build_stream_params(user_prompt, json_mode))
+            async with stream:
+                async for chunk in stream:
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        yield chunk.choices[0].delta.content
+        except Exception as e:
+            logger.error(f"Async LLM Stream Failed ({self.provider}): {e}")
+            yield f"Error: {e}"
+
+    def stream_json(self, user_prompt: str) -> Dict[str, Any]:
+        """
+        Stream a JSON answer and return as soon as the top-level object parses.
+        Each closing brace triggers a parse attempt; trailing tokens are never waited for.
+        """
+        buffer = ""
+        for delta in self.stream_llm(user_prompt, json_mode=True):
+            buffer += delta
+            if "}" not in delta:
+                continue
+            start = buffer.find("{")
+            if start < 0:
+                continue
+            try:
+                return orjson.loads(buffer[start:])
+            except orjson.JSONDecodeError:
+                continue
+        return {"error": f"Incomplete JSON stream: {buffer[:200]}"}
+
 # Singleton instance
 _ANALYST = None
 
@@ -1,10 +1,57 @@
+import socket
 from typing import Any, Dict, List, Optional
 
 import alpaca_trade_api as tradeapi
+import requests
 from loguru import logger
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection
+from urllib3.util.retry import Retry
 
 from .base import BaseBroker
 
+# Probe idle sockets so the pooled connections survive NATs and load balancers
+_KEEPALIVE_OPTIONS = HTTPConnection.default_socket_options + [(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)]
+if hasattr(socket, "TCP_KEEPIDLE"):
+    _KEEPALIVE_OPTIONS += [
+        (socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, 30),
+        (socket.IPPROTO_TCP, socket.TCP_KEEPINTVL, 10),
+        (socket.IPPROTO_TCP, socket.TCP_KEEPCNT, 3),
+    ]
+
+
+# (connect, read) seconds; the SDK passes no timeout, so a stalled socket would hang forever
+REQUEST_TIMEOUT = (3.05, 5.0)
+
+
+class _KeepAliveAdapter(HTTPAdapter):
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs["socket_options"] = _KEEPALIVE_OPTIONS
+        super().init_poolmanager(*args, **kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = REQUEST_TIMEOUT
+        return super().send(request, **kwargs)
+
+
+def _pooled_session() -> requests.Session:
+    """
+    Keep-alive session for the Alpaca REST client.
+    Retries cover idempotent methods only, so an order POST is never resent.
+    """
+    retry = Retry(
+        total=3,
+        backoff_factor=0.2,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=Retry.DEFAULT_ALLOWED_METHODS,
+        raise_on_status=False
+    )
+    adapter = _KeepAliveAdapter(pool_connections=20, pool_maxsize=50, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    return session
+
 
 class AlpacaBroker(BaseBroker):
     def __init__(self, api_key: str, secret_key: str, paper: bool = True, base_url: str = ""):
@@ -33,6 +80,8 @@ class AlpacaBroker(BaseBroker):
                 clean_url,
                 api_version='v2'
             )
+            # Reuse TLS connections across dashboard polls instead of re-handshaking
+            self._api._session = _pooled_session()
             # Test connection
             self._api.get_account()
             self._connected = True
@@ -165,3 +214,15 @@ class AlpacaBroker(BaseBroker):
         except Exception as e:
             logger.error(f"Alpaca cancel error: {e}")
             return 0
+
+    def close_all_positions(self) -> int:
+        if not self._connected: return 0
+        try:
+            # DELETE /v2/positions?cancel_orders=true: one request cancels working orders (so none
+            # can reopen exposure) and liquidates the account; the SDK wrapper has no such flag
+            closed = self._api.delete("/positions", {"cancel_orders": "true"})
+            logger.info(f"Closed {len(closed)} Alpaca positions")
+            return len(closed)
+        except Exception as e:
+            logger.error(f"Alpaca close all positions error: {e}")
+            return 0
@@ -1,3 +1,4 @@
+import asyncio
 from abc import ABC, abstractmethod
 from typing import Any, Dict, List, Optional
 
@@ -47,3 +48,26 @@ class BaseBroker(ABC):
     @abstractmethod
     def cancel_all_orders(self) -> int:
         pass
+
+    @abstractmethod
+    def close_all_positions(self) -> int:
+        """Market-closes every open position in one batch. Returns the number of positions closed."""
+        pass
+
+    async def snapshot(self, recent_limit: int = 50) -> Dict[str, Any]:
+        """
+        Fetch account, positions and orders concurrently.
+        Sync SDK calls run in worker threads, so wall time is the slowest read.
+        """
+        account, positions, open_orders, recent_orders = await asyncio.gather(
+            asyncio.to_thread(self.get_account_info),
+            asyncio.to_thread(self.get_positions),
+            asyncio.to_thread(self.get_open_orders),
+            asyncio.to_thread(self.get_recent_orders, recent_limit)
+        )
+        return {
+            "account": account,
+            "positions": positions,
+            "open_orders": open_orders,
+            "recent_orders": recent_orders
+        }
@@ -1,9 +1,34 @@
+import asyncio
+import copy
+import math
+import time
 from typing import Any, Dict, List, Optional
 
 from loguru import logger
 
 from .base import BaseBroker
 
+try:
+    import nest_asyncio
+    from ib_insync import IB, LimitOrder, MarketOrder, Order, Stock, TagValue
+    IB_AVAILABLE = True
+except ImportError:
+    IB_AVAILABLE = False
+
+
+def _num(value: Optional[float]) -> float:
+    """ib_insync marks missing ticker fields as NaN; anything non-finite counts as missing."""
+    return 0.0 if value is None or not math.isfinite(value) else float(value)
+
+
+def _quote_ready(ticker: Any) -> bool:
+    """A two-sided quote is enough: IDEALPRO FX tickers never report a last trade."""
+    return _num(ticker.bid) > 0 and _num(ticker.ask) > 0
+
+
+# Routing exchange for closing orders, by secType (anything else routes SMART)
+_CLOSE_EXCHANGE = {"CASH": "IDEALPRO"}
+
 
 class IBBroker(BaseBroker):
     def __init__(self, host: str, port: int, client_id: int):
@@ -12,13 +37,17 @@ class IBBroker(BaseBroker):
         self.client_id = client_id
         self._ib = None
         self._connected = False
+        # Streaming tickers by symbol; ib_insync updates them in place as ticks arrive
+        self._tickers: Dict[str, Any] = {}
+        # Qualified contracts by symbol, so the gateway resolves each conId once
+        self._contracts: Dict[str, Any] = {}
 
     def connect(self) -> bool:
+        if not IB_AVAILABLE:
+            raise RuntimeError("ib_insync is not installed; install it to use the IBKR broker")
         try:
-            import nest_asyncio
             nest_asyncio.apply()
 
-            from ib_insync import IB
             if self._ib is None:
                 try:
                     self._ib = IB()
@@ -28,7 +57,12 @@ class IBBroker(BaseBroker):
                     return False
 
             if not self._ib.isConnected():
-                self._ib.connect(self.host, self.port, self.client_id)
+                # Bound blocking requests (qualify, positions, ...) instead of waiting forever
+                self._ib.RequestTimeout = 5.0
+                self._ib.connect(self.host, self.port, self.client_id, timeout=4)
+                # Fresh session: old subscriptions are gone, positions stream from here on
+                self._tickers.clear()
+                self._ib.reqPositions()
 
             self._connected = True
             return True
@@ -44,6 +78,17 @@ class IBBroker(BaseBroker):
             self._connected = False
             return False
 
+    def _contract(self, symbol: str) -> Any:
+        contract = self._contracts.get(symbol)
+        if contract is None:
+            contract = Stock(symbol, "SMART", "USD")
+            qualified = self._ib.qualifyContracts(contract)
+            if not qualified:
+                # Unknown to the gateway: use as-is, but retry qualification next time
+                return contract
+            contract = self._contracts.setdefault(symbol, qualified[0])
+        return contract
+
     def is_connected(self) -> bool:
         return self._connected and self._ib and self._ib.isConnected()
 
@@ -63,12 +108,22 @@ class IBBroker(BaseBroker):
     def get_positions(self) -> List[Dict[str, Any]]:
         if not self.is_connected(): return []
         try:
+            # portfolio() is kept current by the account update stream, no request needed
+            portfolio = self._ib.portfolio()
+            if portfolio:
+                return [{
+                    "symbol": item.contract.symbol,
+                    "quantity": item.position,
+                    "avg_cost": item.averageCost,
+                    "current_price": item.marketPrice,
+                    "market_value": item.marketValue,
+                    "unrealized_pnl": item.unrealizedPNL
+                } for item in portfolio]
+
             positions = []
             for pos in self._ib.positions():
                 avg = pos.avgCost or 0.0
                 qty = pos.position
-                # Note: Skipping real-time price fetch for simplicity in this port
-                # Ideally reuse the reqMktData logic from original TradingApp
                 current_price = avg
                 positions.append({
                     "symbol": pos.contract.symbol,
@@ -86,11 +141,21 @@ class IBBroker(BaseBroker):
     def get_quote(self, symbol: str) -> Dict[str, float]:
         if not self.is_connected(): return {"bid":0.0, "ask":0.0, "last":0.0}
         try:
-            from ib_insync import Stock
-            contract = Stock(symbol, "SMART", "USD")
-            t = self._ib.reqMktData(contract)
-            self._ib.sleep(0.5)
-            return {"bid": t.bid or 0.0, "ask": t.ask or 0.0, "last": t.last or 0.0, "volume": t.volume or 0}
+            t = self._tickers.get(symbol)
+            if t is None:
+                contract = self._contract(symbol)
+                # Subscribe once; later calls read the live ticker from memory
+                t = self._ib.reqMktData(contract, "", False, False)
+                self._tickers[symbol] = t
+                # Wait for the first full quote instead of a blind sleep
+                deadline = time.monotonic() + 1.0
+                while not _quote_ready(t) and time.monotonic() < deadline:
+                    self._ib.waitOnUpdate(timeout=0.05)
+            bid, ask, last = _num(t.bid), _num(t.ask), _num(t.last)
+            if last <= 0 and bid > 0 and ask > 0:
+                # No trade price (FX): quote the midpoint
+                last = (bid + ask) / 2
+            return {"bid": bid, "ask": ask, "last": last, "volume": _num(t.volume)}
         except Exception as e:
             logger.error(f"IB Quote Error: {e}")
             return {"bid":0.0, "ask":0.0, "last":0.0}
@@ -98,8 +163,7 @@ class IBBroker(BaseBroker):
     def submit_order(self, symbol: str, quantity: int, side: str, order_type: str, price: float = None) -> Optional[Any]:
         if not self.is_connected(): return None
         try:
-            from ib_insync import AlgoOrder, LimitOrder, MarketOrder, Stock
-            contract = Stock(symbol, "SMART", "USD")
+            contract = self._contract(symbol)
 
             order = None
             action = side.upper()
@@ -117,36 +181,38 @@ class IBBroker(BaseBroker):
                 if price:
                     order = LimitOrder(action, qty, price)
                     order.algoStrategy = "Adaptive"
-                    order.algoParams = [("adaptivePriority", "Normal")]
+                    order.algoParams = [TagValue("adaptivePriority", "Normal")]
                 else:
                     # Fallback to Market Adaptive? Or just Market.
                     # IBKR Adaptive usually works best as Limit.
                     order = MarketOrder(action, qty)
                     order.algoStrategy = "Adaptive"
-                    order.algoParams = [("adaptivePriority", "Normal")]
+                    order.algoParams = [TagValue("adaptivePriority", "Normal")]
             elif ot == "VWAP":
                 # VWAP Algo
-                order = AlgoOrder(
+                order = Order(
                     action=action,
+                    orderType="MKT",
                     totalQuantity=qty,
                     algoStrategy="Vwap",
                     algoParams=[
-                        ("startTime", ""), # Now
-                        ("endTime", ""), # Market Close
-                        ("maxPctVol", 0.05), # Max 5% of volume
-                        ("noTakeLiq", False)
+                        TagValue("startTime", ""), # Now
+                        TagValue("endTime", ""), # Market Close
+                        TagValue("maxPctVol", "0.05"), # Max 5% of volume
+                        TagValue("noTakeLiq", "0")
                     ]
                 )
             elif ot == "TWAP":
                 # TWAP Algo
-                order = AlgoOrder(
+                order = Order(
                     action=action,
+                    orderType="MKT",
                     totalQuantity=qty,
                     algoStrategy="Twap",
                     algoParams=[
-                        ("startTime", ""),
-                        ("endTime", ""),
-                        ("strategyType", "Marketable")
+                        TagValue("startTime", ""),
+                        TagValue("endTime", ""),
+                        TagValue("strategyType", "Marketable")
                     ]
                 )
             else:
@@ -163,6 +229,34 @@ class IBBroker(BaseBroker):
             logger.error(f"IB Order Error: {e}")
             return None
 
+    async def submit_order_and_wait(
+        self, symbol: str, quantity: int, side: str, order_type: str, price: float = None, timeout: float = 10.0
+    ) -> Optional[Any]:
+        """
+        Submit and wait for the order to fill or be cancelled.
+        Driven by the trade's own events, so confirmation needs no polling of open orders.
+        Returns the trade even on timeout; check trade.orderStatus for the outcome.
+        """
+        trade = self.submit_order(symbol, quantity, side, order_type, price)
+        if trade is None or trade.isDone():
+            return trade
+
+        done = asyncio.Event()
+
+        def on_done(*_):
+            done.set()
+
+        trade.filledEvent += on_done
+        trade.cancelledEvent += on_done
+        try:
+            await asyncio.wait_for(done.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"IBKR order for {symbol} not done after {timeout}s (status: {trade.orderStatus.status})")
+        finally:
+            trade.filledEvent -= on_done
+            trade.cancelledEvent -= on_done
+        return trade
+
     def get_open_orders(self) -> List[Dict[str, Any]]:
         if not self.is_connected(): return []
         orders = []
@@ -196,6 +290,18 @@ class IBBroker(BaseBroker):
             })
         return normalized
 
+    async def snapshot(self, recent_limit: int = 50) -> Dict[str, Any]:
+        """
+        ib_insync keeps account, position and order state locally and is not
+        thread-safe, so these reads stay on the IB loop thread.
+        """
+        return {
+            "account": self.get_account_info(),
+            "positions": self.get_positions(),
+            "open_orders": self.get_open_orders(),
+            "recent_orders": self.get_recent_orders(recent_limit)
+        }
+
     def cancel_all_orders(self) -> int:
         if not self.is_connected(): return 0
         try:
@@ -205,3 +311,28 @@ class IBBroker(BaseBroker):
             return len(trades)
         except Exception:
             return 0
+
+    def close_all_positions(self) -> int:
+        if not self.is_connected(): return 0
+        try:
+            # Cancel working orders first so none can fill and reopen exposure while flattening
+            self._ib.reqGlobalCancel()
+
+            # placeOrder only writes to the socket, so every closing order goes out before any fill comes back
+            count = 0
+            for pos in self._ib.positions():
+                if not pos.position:
+                    continue
+                contract = pos.contract
+                if not contract.exchange:
+                    # Position contracts come back without a routing exchange; route a copy, not ib_insync's own object
+                    contract = copy.copy(contract)
+                    contract.exchange = _CLOSE_EXCHANGE.get(contract.secType, "SMART")
+                action = "SELL" if pos.position > 0 else "BUY"
+                self._ib.placeOrder(contract, MarketOrder(action, abs(pos.position)))
+                count += 1
+            logger.info(f"IBKR closing {count} positions")
+            return count
+        except Exception as e:
+            logger.error(f"IB Close All Positions Error: {e}")
+            return 0
@@ -4,16 +4,20 @@ Deterministic aggregation of raw trade ticks into candles.
 Parity with IBKR TWS behavior.
 """
 
-from dataclasses import dataclass
+from dataclasses import dataclass, replace
 from datetime import datetime
-import math
+import threading
+import time
 from typing import Optional, List, Callable, Dict, Any
+
+import numpy as np
 from loguru import logger
 
 # Constants
 MAX_CLOCK_SKEW_SEC = 5.0 # Stop if local time and exchange time drift too much
+DB_FLUSH_INTERVAL_SEC = 0.25 # Forming-bar upserts are coalesced and written at most this often
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class Tick:
     symbol: str
     price: float
@@ -23,7 +27,7 @@ class Tick:
     source: str = "UNKNOWN"
     asset_class: str = "UNKNOWN"
 
-@dataclass
+@dataclass(slots=True)
 class Candle:
     symbol: str
     start_ts: float
@@ -54,21 +58,79 @@ class BarCloseEventBus:
 
 class SessionManager:
     """Manages exchange hours alignment."""
+    CACHE_SIZE = 4 # Minutes kept; ticks arrive in time order so only the newest matter
+
     def __init__(self, rth_only: bool = True):
         self.rth_only = rth_only
+        # Session state only changes on minute boundaries: epoch minute -> in session
+        self._cache: Dict[int, bool] = {}
+        self._lock = threading.Lock() # Shared across aggregators (and feed threads)
         
     def is_in_session(self, ts: float, symbol: str) -> bool:
         """
         Hard session check.
         TODO: Integrate with pandas_market_calendars for production.
         """
+        minute = int(ts) // 60
+        cached = self._cache.get(minute)
+        if cached is not None:
+            return cached
+
         dt = datetime.fromtimestamp(ts)
         # Mock: 09:30 - 16:00 EST (Mon-Fri)
         if dt.weekday() >= 5: # Weekend
-            return False
-        
-        minutes_since_midnight = dt.hour * 60 + dt.minute
-        return (9*60 + 30) <= minutes_since_midnight <= (16*60)
+            result = False
+        else:
+            minutes_since_midnight = dt.hour * 60 + dt.minute
+            result = (9*60 + 30) <= minutes_since_midnight <= (16*60)
+
+        with self._lock:
+            if len(self._cache) >= self.CACHE_SIZE:
+                # Dicts keep insertion order: drop the oldest minute
+                del self._cache[next(iter(self._cache))]
+            self._cache[minute] = result
+        return result
+
+# One process-wide default so every aggregator shares the same session cache
+DEFAULT_SESSION_MGR = SessionManager()
+
+class BackgroundFlusher:
+    """
+    One daemon thread that writes out buffered bars for every aggregator whose ticks paused.
+    Aggregators schedule themselves at most once per flush, so the thread count stays at one
+    regardless of how many symbols are fed.
+    """
+    def __init__(self, interval_sec: float = DB_FLUSH_INTERVAL_SEC):
+        self.interval_sec = interval_sec
+        self._cond = threading.Condition()
+        self._due: set = set()
+        self._thread: Optional[threading.Thread] = None
+
+    def schedule(self, agg: "CandleAggregator"):
+        with self._cond:
+            self._due.add(agg)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="candle-flusher", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._due:
+                    self._cond.wait()
+            # Let updates coalesce for one interval, then write everything that became due
+            time.sleep(self.interval_sec)
+            with self._cond:
+                due, self._due = self._due, set()
+            for agg in due:
+                try:
+                    agg.flush()
+                except Exception as e:
+                    # One failing aggregator must not stop the flushes of every other symbol
+                    logger.error(f"Background candle flush failed for {agg.symbol}: {e}")
+
+DEFAULT_FLUSHER = BackgroundFlusher()
 
 class CandleAggregator:
     """
@@ -82,6 +144,19 @@ class CandleAggregator:
     5. TRADE-ONLY: Ignores ticks with size <= 0.
     """
     
+    UPSERT_SQL = """
+        INSERT INTO realtime_candles (symbol, timestamp, open, high, low, close, volume, is_final, source, asset_class)
+        VALUES (?, to_timestamp(?)::TIMESTAMP, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT (symbol, timestamp) DO UPDATE SET
+            high = EXCLUDED.high,
+            low = EXCLUDED.low,
+            close = EXCLUDED.close,
+            volume = EXCLUDED.volume,
+            is_final = EXCLUDED.is_final,
+            source = EXCLUDED.source,
+            asset_class = EXCLUDED.asset_class
+    """
+
     def __init__(
         self, 
         symbol: str, 
@@ -94,33 +169,55 @@ class CandleAggregator:
     ):
         self.symbol = symbol
         self.interval_sec = interval_sec
-        self.session_mgr = session_mgr or SessionManager()
+        self.session_mgr = session_mgr or DEFAULT_SESSION_MGR
         self.event_bus = event_bus or BarCloseEventBus()
         self.db_mgr = db_mgr
         self.source = source
         self.asset_class = asset_class
         
         self.current_candle: Optional[Candle] = None
+        # Pooled bar instance: reset in place on every new bucket instead of re-allocated
+        self._spare = Candle(symbol, 0, 0, 0, 0, 0, 0, 0, source=source, asset_class=asset_class)
         self.last_finalized_ts: float = 0
         self.last_tick_ts: float = 0 # For strict monotonicity check
+        # Session state is minute-granular: only re-ask the SessionManager on a new minute
+        self._session_minute: int = -1
+        self._in_session: bool = False
+
+        # Write-behind buffer: latest upsert params per bar, keyed by integer bucket index.
+        # The buffer is per symbol, so the bucket alone is unique; no per-tick key building.
+        self._pending: Dict[int, tuple] = {}
+        # _flush_lock guards the buffer (held only to swap or insert, never during a DB write);
+        # _write_lock serialises flushes so batches reach the DB in order
+        self._flush_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._flush_scheduled = False
         
     def process_tick(self, tick_raw: Tick):
         """Processes a single trade tick with strict parity rules."""
+        # Hot path: read tick fields once into locals
+        price = tick_raw.price
+        size = tick_raw.size
         
         # 1. Trade-Only Guard (Size > 0)
-        if tick_raw.size <= 0:
+        if size <= 0:
             return
             
         # 2. Timestamp Normalization (Quantization)
         exchange_ts = round(tick_raw.exchange_ts, 3)
         
         # 3. Session Enforcement
-        if not self.session_mgr.is_in_session(exchange_ts, self.symbol):
+        minute = int(exchange_ts) // 60
+        if minute != self._session_minute:
+            self._in_session = self.session_mgr.is_in_session(exchange_ts, self.symbol)
+            self._session_minute = minute
+        if not self._in_session:
             return
             
         # 4. Out-of-Order / Late Tick Rejection
         if self.last_finalized_ts > 0 and exchange_ts < self.last_finalized_ts:
-            logger.warning(f"LATE TICK REJECTED for {self.symbol}: {exchange_ts} < finalized_boundary={self.last_finalized_ts}")
+            # Lazy: the message is only formatted if a sink accepts WARNING
+            logger.opt(lazy=True).warning("{}", lambda: f"LATE TICK REJECTED for {self.symbol}: {exchange_ts} < finalized_boundary={self.last_finalized_ts}")
             return
             
         # 5. Clock-Skew Detection
@@ -130,94 +227,200 @@ class CandleAggregator:
             # In live production, this should trigger a safety halt.
             
         # 6. Bucket calculation
-        bucket_start = math.floor(exchange_ts / self.interval_sec) * self.interval_sec
+        interval = self.interval_sec
+        bucket_start = int(exchange_ts) // interval * interval
         
         # 7. Check for NEW bar(s) and handle Gaps
-        if self.current_candle:
-            if bucket_start > self.current_candle.start_ts:
-                self._finalize_candle()
-                
-                # EMIT EMPTY BARS FOR GAPS
-                gap_start = self.last_finalized_ts 
-                while gap_start < bucket_start:
-                    self._emit_empty_candle(gap_start)
-                    gap_start += self.interval_sec
-
-        # 8. Initialize or Update
-        if not self.current_candle:
-            self.current_candle = Candle(
-                symbol=self.symbol,
-                start_ts=bucket_start,
-                end_ts=bucket_start + self.interval_sec,
-                open=tick_raw.price,
-                high=tick_raw.price,
-                low=tick_raw.price,
-                close=tick_raw.price,
-                volume=tick_raw.size,
-                source=self.source,
-                asset_class=self.asset_class
-            )
+        candle = self.current_candle
+        if candle and bucket_start > candle.start_ts:
+            self._roll_to(bucket_start)
+            candle = None
+
+        # 8. Initialize or Update (compare-and-store: no max/min calls, no store when unchanged)
+        if not candle:
+            self._open_bar(bucket_start, price, price, price, price, size)
+            candle = self.current_candle
         else:
-            self.current_candle.high = max(self.current_candle.high, tick_raw.price)
-            self.current_candle.low = min(self.current_candle.low, tick_raw.price)
-            self.current_candle.close = tick_raw.price
-            self.current_candle.volume += tick_raw.size
+            if price > candle.high:
+                candle.high = price
+            elif price < candle.low:
+                candle.low = price
+            candle.close = price
+            candle.volume += size
             
         self.last_tick_ts = exchange_ts
         
         # BROADCAST: Persistent update for forming bar visibility in Dashboard
         # This acts as the "Heartbeat" - even before bar close.
+        self._broadcast_to_db(candle)
+
+    def process_ticks(self, ts: np.ndarray, price: np.ndarray, size: np.ndarray):
+        """
+        Batch variant of `process_tick` for trade arrays in exchange-time order.
+        OHLCV is reduced per run of same-bucket ticks with NumPy, so the Python
+        loop runs once per bar instead of once per tick.
+
+        Same rules as the scalar path, except that session and late-tick checks
+        apply per bucket and clock-skew detection (which needs recv_ts) is skipped.
+        """
+        ts = np.round(np.asarray(ts, dtype=np.float64), 3)
+        price = np.asarray(price, dtype=np.float64)
+        size = np.asarray(size, dtype=np.float64)
+
+        # Trade-Only Guard (Size > 0)
+        trades = size > 0
+        ts, price, size = ts[trades], price[trades], size[trades]
+        if ts.size == 0:
+            return
+
+        # Segment boundaries: indices where the bucket changes
+        buckets = np.floor_divide(ts, self.interval_sec).astype(np.int64)
+        starts = np.concatenate(([0], np.flatnonzero(np.diff(buckets)) + 1))
+        ends = np.append(starts[1:], ts.size)
+
+        opens = price[starts]
+        highs = np.maximum.reduceat(price, starts)
+        lows = np.minimum.reduceat(price, starts)
+        closes = price[ends - 1]
+        volumes = np.add.reduceat(size, starts)
+
+        for i, first in enumerate(starts):
+            if not self.session_mgr.is_in_session(float(ts[first]), self.symbol):
+                continue
+
+            # Bar boundaries are bucket-aligned: a bucket is either wholly late or not at all
+            bucket_start = float(buckets[first] * self.interval_sec)
+            if self.last_finalized_ts > 0 and bucket_start < self.last_finalized_ts:
+                logger.opt(lazy=True).warning("{}", lambda: f"LATE TICKS REJECTED for {self.symbol}: bucket {bucket_start} < finalized_boundary={self.last_finalized_ts}")
+                continue
+
+            if self.current_candle and bucket_start > self.current_candle.start_ts:
+                self._roll_to(bucket_start)
+
+            if not self.current_candle:
+                self._open_bar(
+                    bucket_start, float(opens[i]), float(highs[i]), float(lows[i]), float(closes[i]), float(volumes[i])
+                )
+            else:
+                self.current_candle.high = max(self.current_candle.high, float(highs[i]))
+                self.current_candle.low = min(self.current_candle.low, float(lows[i]))
+                self.current_candle.close = float(closes[i])
+                self.current_candle.volume += float(volumes[i])
+
+            self.last_tick_ts = float(ts[ends[i] - 1])
+
+        # One heartbeat for the whole batch
         self._broadcast_to_db(self.current_candle)
 
+    def _open_bar(self, bucket_start: float, open_: float, high: float, low: float, close: float, volume: float):
+        """Starts a new forming bar by resetting the pooled instance."""
+        c = self._spare
+        c.start_ts = bucket_start
+        c.end_ts = bucket_start + self.interval_sec
+        c.open = open_
+        c.high = high
+        c.low = low
+        c.close = close
+        c.volume = volume
+        c.is_final = False
+        self.current_candle = c
+
+    def _roll_to(self, bucket_start: float):
+        """Closes the current bar and fills any gap up to `bucket_start`."""
+        self._finalize_candle()
+
+        # EMIT EMPTY BARS FOR GAPS
+        gap_start = self.last_finalized_ts
+        while gap_start < bucket_start:
+            self._emit_empty_candle(gap_start)
+            gap_start += self.interval_sec
+
     def _broadcast_to_db(self, candle: Optional[Candle]):
-        """Upserts the candle into the realtime_candles table for inter-process communication."""
+        """
+        Queues an upsert of the candle into realtime_candles for inter-process communication.
+        Updates to the same bar overwrite each other and are written by the background flusher;
+        final bars are written immediately.
+        """
         if not self.db_mgr or not candle:
             return
-            
+
+        params = (
+            candle.symbol,
+            candle.start_ts, # Epoch seconds; DuckDB converts to local TIMESTAMP like fromtimestamp
+            candle.open,
+            candle.high,
+            candle.low,
+            candle.close,
+            candle.volume,
+            candle.is_final,
+            candle.source,
+            candle.asset_class
+        )
+        schedule = False
+        with self._flush_lock:
+            self._pending[int(candle.start_ts) // self.interval_sec] = params
+            if not candle.is_final and not self._flush_scheduled:
+                # Forming bars are written by the shared flusher, also after ticks stop (quiet symbol, session end)
+                self._flush_scheduled = schedule = True
+        if candle.is_final:
+            self.flush()
+        elif schedule:
+            DEFAULT_FLUSHER.schedule(self)
+
+    def flush(self):
+        """
+        Writes all pending candle upserts in a single transaction.
+        Called on bar close and by the background flusher; feeds call it once more on shutdown.
+        """
+        with self._write_lock:
+            # Swap the buffer out first so new ticks land in a fresh one while the batch is written
+            with self._flush_lock:
+                self._flush_scheduled = False
+                if not self.db_mgr or not self._pending:
+                    return
+                batch, self._pending = self._pending, {}
+            self._write_batch(batch)
+
+    def _write_batch(self, batch: Dict[int, tuple]):
+        """Upserts one swapped-out batch; on failure the rows go back into the buffer."""
         try:
-            sql = """
-                INSERT INTO realtime_candles (symbol, timestamp, open, high, low, close, volume, is_final, source, asset_class)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ON CONFLICT (symbol, timestamp) DO UPDATE SET
-                    high = EXCLUDED.high,
-                    low = EXCLUDED.low,
-                    close = EXCLUDED.close,
-                    volume = EXCLUDED.volume,
-                    is_final = EXCLUDED.is_final,
-                    source = EXCLUDED.source,
-                    asset_class = EXCLUDED.asset_class
-            """
-            params = (
-                candle.symbol,
-                datetime.fromtimestamp(candle.start_ts),
-                candle.open,
-                candle.high,
-                candle.low,
-                candle.close,
-                candle.volume,
-                candle.is_final,
-                candle.source,
-                candle.asset_class
-            )
-            self.db_mgr.execute(sql, params)
+            conn = self.db_mgr.connect()
+            try:
+                # One transaction and one prepared statement for the whole batch
+                conn.begin()
+                try:
+                    conn.executemany(self.UPSERT_SQL, list(batch.values()))
+                    conn.commit()
+                except Exception:
+                    conn.rollback()
+                    raise
+            finally:
+                conn.close()
         except Exception as e:
             logger.error(f"Failed to broadcast candle to DB: {e}")
+            # Re-queue for the next flush unless a newer update for that bar arrived
+            with self._flush_lock:
+                for key, params in batch.items():
+                    self._pending.setdefault(key, params)
 
     def _finalize_candle(self):
         """Finalizes the current open bar."""
         if not self.current_candle:
             return
             
-        self.current_candle.is_final = True
-        final_bar = self.current_candle
+        # Copy out: subscribers keep the final bar while the live instance is reused
+        final_bar = replace(self.current_candle, is_final=True)
         self.last_finalized_ts = final_bar.end_ts # Use END as the boundary
         self.current_candle = None
         
-        logger.info(f"BAR CLOSE | {self.symbol} | {datetime.fromtimestamp(final_bar.start_ts).strftime('%H:%M:%S')} | C: {final_bar.close}")
+        # Lazy: skip the datetime + strftime on every bar close unless INFO is enabled
+        logger.opt(lazy=True).info("{}", lambda: f"BAR CLOSE | {self.symbol} | {datetime.fromtimestamp(final_bar.start_ts).strftime('%H:%M:%S')} | C: {final_bar.close}")
         
+        # NOTIFY first: signal subscribers should not wait on the DB write
+        self.event_bus.emit(final_bar)
+
         # PERSIST: Snapshot last finalized for restart safety
         self._broadcast_to_db(final_bar)
-        self.event_bus.emit(final_bar)
         
     def _emit_empty_candle(self, start_ts: float):
         """Emits an empty candle with volume=0, keeping previous close as OHLC."""
@@ -1,9 +1,59 @@
+import os
+import threading
+import time
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Union
 
+import numpy as np
+import polars as pl
 import yaml
+from cachetools import TTLCache
 from loguru import logger
 
+from config.registry import get_registry
+from config.settings import get_settings
+from qsconnect.database.duckdb_manager import DuckDBManager
+
+# Risk queries keyed by (SQL text, bound parameters). Parameters carry symbols and
+# weights, so an unchanged book reuses results across refreshes (and RiskManager instances).
+_RISK_QUERY_CACHE: TTLCache = TTLCache(maxsize=256, ttl=60)
+_RISK_CACHE_LOCK = threading.RLock()
+
+# libyaml C parser when available; same safe semantics as yaml.safe_load
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# Parsed limits files keyed by (path, mtime_ns). Treated as read-only by consumers;
+# editing the file changes the mtime, so hot reloads still pick it up.
+_LIMITS_CACHE: Dict[tuple, Dict[str, Any]] = {}
+
+
+@dataclass(slots=True)
+class PositionBook:
+    """Column view of a position list: symbols and market values as parallel arrays."""
+    symbols: List[str]
+    market_value: np.ndarray
+
+    @classmethod
+    def of(cls, positions: "Positions") -> "PositionBook":
+        """Builds the book from broker position dicts; an existing book is returned as is."""
+        if isinstance(positions, PositionBook):
+            return positions
+        return cls(
+            [p["symbol"] for p in positions],
+            np.fromiter((p["market_value"] for p in positions), dtype=np.float64, count=len(positions))
+        )
+
+    def __len__(self) -> int:
+        return len(self.symbols)
+
+    @property
+    def gross_value(self) -> float:
+        return float(np.abs(self.market_value).sum())
+
+
+Positions = Union[List[Dict[str, Any]], PositionBook]
+
 
 class RiskManager:
     """
@@ -11,6 +61,27 @@ class RiskManager:
     Enforces portfolio-wide constraints and execution safety.
     """
 
+    # Weighted daily portfolio return `pr(date, ret)`, so dispersion and tail statistics
+    # aggregate inside DuckDB in one pass. Binds (symbols, weights); the text never changes.
+    PORTFOLIO_RETURNS_CTE = """
+        WITH weights AS (SELECT unnest(?) as symbol, unnest(?) as w),
+        returns AS (
+            SELECT symbol, date, (close / lag(close) OVER (PARTITION BY symbol ORDER BY date)) - 1 as r
+            FROM historical_prices_fmp
+            WHERE symbol IN (SELECT symbol FROM weights)
+            AND date > (CURRENT_DATE - INTERVAL 300 DAY)
+        ),
+        pr AS (
+            SELECT date, SUM(r * w) as ret
+            FROM returns JOIN weights USING (symbol)
+            WHERE r IS NOT NULL
+            GROUP BY date
+        )
+    """
+
+    FSCORE_REFRESH_SEC = 300 # The snapshot is rebuilt by the factor job, not per order
+    SECTOR_REFRESH_SEC = 86400 # stock_list_fmp is refreshed at most daily
+
     def __init__(self, limits_path: Optional[Path] = None):
         if limits_path is None:
             limits_path = Path(__file__).parent.parent / "config" / "risk_limits.yaml"
@@ -19,16 +90,59 @@ class RiskManager:
         self.limits: Dict[str, Any] = {}
         self.load_limits()
 
+        # F-Scores from factor_ranks_snapshot, reloaded at most every FSCORE_REFRESH_SEC
+        self._fscore_map: Optional[Dict[str, int]] = None
+        self._fscore_loaded_at: float = 0.0
+
+        # symbol -> sector from stock_list_fmp, reloaded at most every SECTOR_REFRESH_SEC
+        self._sector_meta: Optional[pl.DataFrame] = None
+        self._sector_loaded_at: float = 0.0
+
+        # Read-only DuckDB manager behind _db, opened on first use
+        self._db_manager: Optional[DuckDBManager] = None
+        self._db_lock = threading.Lock()
+
     def load_limits(self):
-        """Load risk limits from YAML."""
+        """Load risk limits from YAML (parsed once per file version)."""
         try:
-            with open(self.limits_path, 'r') as f:
-                self.limits = yaml.safe_load(f)
-                logger.info("Risk Manager initialized with centralized limits")
+            key = (str(self.limits_path), os.stat(self.limits_path).st_mtime_ns)
+            cached = _LIMITS_CACHE.get(key)
+            if cached is not None:
+                self.limits = cached
+            else:
+                with open(self.limits_path, 'r') as f:
+                    self.limits = yaml.load(f, Loader=_YAML_LOADER)
+                    _LIMITS_CACHE[key] = self.limits
+                    logger.info("Risk Manager initialized with centralized limits")
         except Exception as e:
             logger.error(f"Failed to load risk limits from {self.limits_path}: {e}")
             self.limits = {}
 
+        self._compile_limits()
+
+    def _compile_limits(self):
+        """
+        Resolves the limits read on every order into plain attributes once,
+        so the pre-trade path does no nested dict.get chains.
+        """
+        limits = self.limits or {}
+        global_limits = limits.get("GLOBAL_LIMITS") or {}
+        self._max_spread_pct = float(global_limits.get("max_spread_pct", 0.02)) # Default 2%
+        self._daily_loss_limit = float(global_limits.get("daily_loss_limit_usd", 5000.0))
+        self._symbol_limit_pct = float(global_limits.get("max_symbol_exposure_pct", 0.1))
+        self._max_leverage = float(global_limits.get("max_total_leverage", 2.0))
+        self._ac_limit_pct: Dict[str, float] = {
+            ac: float((cfg or {}).get("max_total_exposure_pct", 1.0))
+            for ac, cfg in (limits.get("ASSET_CLASS_LIMITS") or {}).items()
+        }
+        # Asset classes any real broker may execute: O(1) membership per order
+        self._allowed_classes = frozenset(
+            cls
+            for broker, classes in (limits.get("EXECUTION_AUTHORITY") or {}).items()
+            if broker != "NONE"
+            for cls in (classes or [])
+        )
+
     def validate_spread(self, symbol: str, bid: float, ask: float) -> (bool, str):
         """
         Check if the bid-ask spread is within acceptable limits (Liquidity Check).
@@ -37,7 +151,7 @@ class RiskManager:
             return False, "Invalid quote (bid/ask <= 0)"
 
         spread_pct = (ask - bid) / ((ask + bid) / 2)
-        max_spread = self.limits.get("GLOBAL_LIMITS", {}).get("max_spread_pct", 0.02) # Default 2%
+        max_spread = self._max_spread_pct
 
         if spread_pct > max_spread:
             return False, f"Spread {spread_pct:.2%} exceeds limit {max_spread:.2%}"
@@ -49,7 +163,7 @@ class RiskManager:
         Check if the daily P&L has breached the maximum loss limit.
         Returns (True, msg) if circuit breaker should trigger (HALT).
         """
-        daily_loss_limit = self.limits.get("GLOBAL_LIMITS", {}).get("daily_loss_limit_usd", 5000.0)
+        daily_loss_limit = self._daily_loss_limit
 
         # Note: Limit is positive (e.g. 5000), PnL is negative (e.g. -5500)
         if current_pnl < -abs(daily_loss_limit):
@@ -71,6 +185,7 @@ class RiskManager:
     ) -> (bool, str):
         """
         Comprehensive pre-trade check.
+        Checks run cheapest first: O(1) rejects exit before scanning positions or touching DuckDB.
         
         Returns:
             (is_valid, reason)
@@ -78,16 +193,12 @@ class RiskManager:
         if not self.limits:
             return False, "Risk limits not loaded"
 
+        # Gross order value for the leverage/asset-class checks, signed delta for the symbol check
         order_value = abs(quantity * price)
+        signed_order_value = order_value if side == "BUY" else -order_value
 
         # 1. Execution Authority Check
-        authority = self.limits.get("EXECUTION_AUTHORITY", {})
-        allowed_classes = []
-        for broker, classes in authority.items():
-            if broker != "NONE":
-                allowed_classes.extend(classes)
-
-        if asset_class not in allowed_classes:
+        if asset_class not in self._allowed_classes:
             return False, f"Execution not allowed for asset class: {asset_class}"
 
         # 2. Daily Loss Limit (Circuit Breaker Check)
@@ -95,47 +206,47 @@ class RiskManager:
         if should_halt:
             return False, f"CIRCUIT BREAKER: {msg}"
 
-        # 3. Individual Symbol Exposure
-        symbol_limit_pct = self.limits.get("GLOBAL_LIMITS", {}).get("max_symbol_exposure_pct", 0.1)
+        # 3. Leverage Check (O(1): account totals only)
+        max_leverage = self._max_leverage
+        gross_value = account_info.get("GrossPositionValue", 0.0) + order_value
+        leverage = gross_value / portfolio_value
+
+        if leverage > max_leverage:
+            return False, f"Portfolio leverage {leverage:.2f} exceeds limit {max_leverage}"
 
-        # Calculate existing position value for this symbol
+        # Single pass over positions: this symbol's value (last entry wins) and the asset-class total
         existing_value = 0.0
-        for pos in current_positions:
-            if pos["symbol"] == symbol:
-                existing_value = pos["market_value"]
-
-        new_symbol_value = abs(existing_value + (order_value if side == "BUY" else -order_value))
+        ac_total_value = order_value
+        if current_positions:
+            # Positions are tagged with asset_class at ingestion; untagged ones are resolved once and tagged in place
+            reg = None
+            for pos in current_positions:
+                pos_symbol, market_value = pos["symbol"], pos["market_value"]
+                if pos_symbol == symbol:
+                    existing_value = market_value
+                pos_class = pos.get("asset_class")
+                if pos_class is None:
+                    reg = reg or get_registry()
+                    pos_class = pos.setdefault("asset_class", reg.get_asset_class(pos_symbol))
+                if pos_class == asset_class:
+                    ac_total_value += abs(market_value)
+
+        # 4. Individual Symbol Exposure
+        symbol_limit_pct = self._symbol_limit_pct
+
+        new_symbol_value = abs(existing_value + signed_order_value)
         symbol_exposure = new_symbol_value / portfolio_value
 
         if symbol_exposure > symbol_limit_pct:
             return False, f"Symbol exposure {symbol_exposure:.1%} exceeds limit {symbol_limit_pct:.1%}"
 
-        # 4. Asset Class Exposure Check
-        ac_limits = self.limits.get("ASSET_CLASS_LIMITS", {}).get(asset_class, {})
-        ac_limit_pct = ac_limits.get("max_total_exposure_pct", 1.0)
-
-        ac_total_value = order_value
-        for pos in current_positions:
-            # Note: positions would need to be tagged with asset_class in a real system
-            # or looked up from the registry. Assuming for now we can filter by symbol prefix or registry
-            from config.registry import get_registry
-            reg = get_registry()
-            if reg.get_asset_class(pos["symbol"]) == asset_class:
-                ac_total_value += abs(pos["market_value"])
-
+        # 5. Asset Class Exposure Check
+        ac_limit_pct = self._ac_limit_pct.get(asset_class, 1.0)
         ac_exposure = ac_total_value / portfolio_value
         if ac_exposure > ac_limit_pct:
             return False, f"Asset class {asset_class} exposure {ac_exposure:.1%} exceeds limit {ac_limit_pct:.1%}"
 
-        # 5. Leverage Check
-        max_leverage = self.limits.get("GLOBAL_LIMITS", {}).get("max_total_leverage", 2.0)
-        gross_value = account_info.get("GrossPositionValue", 0.0) + order_value
-        leverage = gross_value / portfolio_value
-
-        if leverage > max_leverage:
-            return False, f"Portfolio leverage {leverage:.2f} exceeds limit {max_leverage}"
-
-        # 6. Asset-Specific Safety Check (Institutional Readiness)
+        # 6. Asset-Specific Safety Check (Institutional Readiness) - the only DB-backed check, so last
         is_safe, safety_reason = self._validate_asset_safety(symbol, asset_class)
         if not is_safe:
             return False, f"SAFETY REJECTED: {safety_reason}"
@@ -155,15 +266,9 @@ class RiskManager:
 
         try:
             # Check F-Score from Factor Engine Snapshot
-            from config.settings import get_settings
-            from qsconnect.database.duckdb_manager import DuckDBManager
-            db = DuckDBManager(get_settings().duckdb_path, read_only=True)
-
-            res = db.query(f"SELECT f_score FROM factor_ranks_snapshot WHERE symbol = '{symbol}'")
-            if not res.is_empty():
-                f_score = res["f_score"][0]
-                if f_score is not None and f_score < 3:
-                    return False, f"Piotroski F-Score too low ({f_score}/9). High financial distress risk."
+            f_score = self._get_fscore(symbol)
+            if f_score is not None and f_score < 3:
+                return False, f"Piotroski F-Score too low ({f_score}/9). High financial distress risk."
 
             return True, "Fundamental Safety OK"
         except Exception as e:
@@ -171,67 +276,159 @@ class RiskManager:
             logger.warning(f"Safety check DB error for {symbol}: {e}")
             return True, "Safety check skipped (DB error)"
 
-    def calculate_portfolio_var(self, positions: List[Dict[str, Any]], confidence_level: float = 0.95) -> float:
+    @property
+    def _db(self) -> DuckDBManager:
+        """Read-only DuckDB manager, opened on first use and reused (one connection, a cursor per query)."""
+        # Fast path: no lock once opened
+        db = self._db_manager
+        if db is not None:
+            return db
+
+        # API handlers run on worker threads; the lock keeps first use to a single connection
+        with self._db_lock:
+            if self._db_manager is None:
+                self._db_manager = DuckDBManager(get_settings().duckdb_path, read_only=True)
+            return self._db_manager
+
+    def _get_fscore(self, symbol: str) -> Optional[int]:
+        """F-Score lookup from an in-memory copy of the snapshot table (one query per refresh)."""
+        now = time.monotonic()
+        if self._fscore_map is None or now - self._fscore_loaded_at > self.FSCORE_REFRESH_SEC:
+            res = self._db.query("SELECT symbol, f_score FROM factor_ranks_snapshot WHERE f_score IS NOT NULL")
+            self._fscore_map = dict(zip(res["symbol"].to_list(), res["f_score"].to_list()))
+            self._fscore_loaded_at = now
+        return self._fscore_map.get(symbol)
+
+    def _get_sector_meta(self) -> pl.DataFrame:
+        """Universe-wide symbol -> sector frame, held in memory between daily refreshes."""
+        now = time.monotonic()
+        if self._sector_meta is None or now - self._sector_loaded_at > self.SECTOR_REFRESH_SEC:
+            self._sector_meta = self._db.query("SELECT symbol, sector FROM stock_list_fmp").unique("symbol", keep="last")
+            self._sector_loaded_at = now
+        return self._sector_meta
+
+    def _query(self, sql: str, params: Optional[List[Any]] = None) -> pl.DataFrame:
+        """Runs a read-only, parameterised risk query, memoized for a minute."""
+        key = (sql, repr(params))
+        with _RISK_CACHE_LOCK:
+            cached = _RISK_QUERY_CACHE.get(key)
+        if cached is not None:
+            return cached
+
+        result = self._db.query(sql, params)
+
+        with _RISK_CACHE_LOCK:
+            _RISK_QUERY_CACHE[key] = result
+        return result
+
+    def calculate_portfolio_var(self, positions: Positions, confidence_level: float = 0.95) -> float:
         """
         Estimate Portfolio Value-at-Risk (VaR) using the Historical Simulation method.
         Fetches real historical returns from DuckDB for all positions.
         """
-        import numpy as np
-        if not positions:
+        book = PositionBook.of(positions)
+        if not book:
             return 0.0
 
         try:
-            from config.settings import get_settings
-            from qsconnect.database.duckdb_manager import DuckDBManager
-            db = DuckDBManager(get_settings().duckdb_path, read_only=True)
-
-            symbols = [p["symbol"] for p in positions]
-            weights = np.array([p["market_value"] for p in positions])
-            total_value = sum(abs(w) for w in weights)
-
+            stats, total_value = self._portfolio_stats(book, confidence_level)
             if total_value == 0: return 0.0
 
-            # Normalize weights (preserving sign for Long/Short)
-            normalized_weights = weights / total_value
-
-            # 1. Fetch last 252 days of returns for all symbols
-            # We use Polars for high-speed pivot and covariance calculation
-            symbols_str = ",".join([f"'{s}'" for s in symbols])
-            sql = f"""
-                SELECT symbol, date, (close / lag(close) OVER (PARTITION BY symbol ORDER BY date)) - 1 as daily_return
-                FROM historical_prices_fmp
-                WHERE symbol IN ({symbols_str})
-                AND date > (CURRENT_DATE - INTERVAL 300 DAY)
-            """
-            df_returns = db.query(sql).drop_nulls()
-
-            if df_returns.is_empty():
+            if stats["cutoff"] is None:
                 logger.warning("No historical returns found for VaR calculation. Falling back to 2% proxy.")
                 return total_value * 0.02
 
-            # Pivot to Symbol Columns
-            pivoted = df_returns.pivot(values="daily_return", index="date", on="symbol").drop("date").fill_null(0.0)
-            returns_matrix = pivoted.to_numpy() # Rows: Days, Cols: Symbols
+            # VaR is typically expressed as a positive dollar amount (the potential loss)
+            return abs(stats["cutoff"]) * total_value
+
+        except Exception as e:
+            logger.error(f"Advanced VaR calculation failed: {e}. Using fallback.")
+            return book.gross_value * 0.02
 
-            # 2. Calculate Portfolio Returns
-            # Dot product: [Days x Symbols] * [Symbols x 1] = [Days x 1]
-            portfolio_returns = np.dot(returns_matrix, normalized_weights)
+    def _portfolio_weights(self, book: PositionBook) -> (List[Any], float):
+        """Returns the CTE parameters [symbols, normalized weights] and the gross value."""
+        total_value = book.gross_value
+        if total_value == 0:
+            return [], 0.0
 
-            # 3. Percentile-based VaR
-            # 95% confidence = 5th percentile of losses
-            var_percentile = np.percentile(portfolio_returns, (1 - confidence_level) * 100)
+        # Normalized weights (preserving sign for Long/Short)
+        return [book.symbols, (book.market_value / total_value).tolist()], total_value
 
-            # VaR is typically expressed as a positive dollar amount (the potential loss)
-            return abs(var_percentile) * total_value
+    def _portfolio_stats(self, book: PositionBook, confidence_level: float) -> (Dict[str, Any], float):
+        """
+        VaR cut-off, ES tail mean and daily volatility of the portfolio return,
+        all from one DuckDB aggregate. The three calculators share this query,
+        so a risk refresh at one confidence level costs a single (cached) round trip.
+        Returns (stats, gross_value).
+        """
+        params, total_value = self._portfolio_weights(book)
+        if total_value == 0:
+            return {}, 0.0
+
+        sql = self.PORTFOLIO_RETURNS_CTE + """,
+            cutoff AS (SELECT quantile_cont(ret, ?) as q FROM pr)
+            SELECT
+                any_value(q) as cutoff,
+                avg(ret) FILTER (WHERE ret <= q) as tail_mean,
+                stddev_samp(ret) as daily_vol
+            FROM pr, cutoff
+        """
+        return self._query(sql, params + [1 - confidence_level]).row(0, named=True), total_value
+
+    def calculate_portfolio_volatility(self, positions: Positions) -> float:
+        """
+        Annualized portfolio volatility (fraction of gross value).
+        The stddev of the weighted daily return equals sqrt(w' Cov w), so no
+        covariance matrix is assembled in Python.
+        """
+        book = PositionBook.of(positions)
+        if not book:
+            return 0.0
+
+        try:
+            # Volatility does not depend on the cut-off; 95% shares the get_portfolio_risk query
+            stats, total_value = self._portfolio_stats(book, 0.95)
+            if total_value == 0: return 0.0
+
+            if stats["daily_vol"] is None:
+                logger.warning("No historical returns found for volatility calculation.")
+                return 0.0
+
+            return float(stats["daily_vol"]) * 252 ** 0.5
 
         except Exception as e:
-            logger.error(f"Advanced VaR calculation failed: {e}. Using fallback.")
-            return sum(abs(p["market_value"]) for p in positions) * 0.02
+            logger.error(f"Portfolio volatility calculation failed: {e}")
+            return 0.0
+
+    def calculate_expected_shortfall(self, positions: Positions, confidence_level: float = 0.95) -> float:
+        """
+        Historical Expected Shortfall (CVaR): mean portfolio loss beyond the VaR cut-off.
+        The percentile and the tail mean are computed in DuckDB.
+        """
+        book = PositionBook.of(positions)
+        if not book:
+            return 0.0
+
+        try:
+            stats, total_value = self._portfolio_stats(book, confidence_level)
+            if total_value == 0: return 0.0
+
+            if stats["tail_mean"] is None:
+                logger.warning("No historical returns found for ES calculation. Falling back to 2.5% proxy.")
+                return total_value * 0.025
 
-    def get_portfolio_exposure(self, positions: List[Dict[str, Any]], total_equity: float) -> Dict[str, Any]:
+            return abs(float(stats["tail_mean"])) * total_value
+
+        except Exception as e:
+            logger.error(f"Expected Shortfall calculation failed: {e}. Using fallback.")
+            return book.gross_value * 0.025
+
+    def get_portfolio_exposure(self, positions: Positions, total_equity: float) -> Dict[str, Any]:
         """Calculates Long, Short, Gross and Net exposure."""
-        long_val = sum(p["market_value"] for p in positions if p["market_value"] > 0)
-        short_val = sum(abs(p["market_value"]) for p in positions if p["market_value"] < 0)
+        # Masked sums over the market value column
+        mv = PositionBook.of(positions).market_value
+        long_val = mv[mv > 0].sum()
+        short_val = abs(mv[mv < 0].sum())
 
         gross = long_val + short_val
         net = long_val - short_val
@@ -245,42 +442,49 @@ class RiskManager:
             "gross_leverage": float(gross / total_equity) if total_equity > 0 else 0.0
         }
 
-    def get_concentration_metrics(self, positions: List[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    def get_concentration_metrics(self, positions: Positions) -> Dict[str, List[Dict[str, Any]]]:
         """Detects sector and industry concentration."""
-        from config.settings import get_settings
-        from qsconnect.database.duckdb_manager import DuckDBManager
-        db = DuckDBManager(get_settings().duckdb_path, read_only=True)
+        book = PositionBook.of(positions)
+        if not book: return {"sectors": [], "industries": []}
 
-        symbols = [p["symbol"] for p in positions]
-        if not symbols: return {"sectors": [], "industries": []}
+        # Sector metadata comes from the in-memory copy (one row per symbol)
+        meta = self._get_sector_meta()
 
-        # Get metadata for positions
-        symbols_str = ",".join([f"'{s}'" for s in symbols])
-        meta = db.query(f"SELECT symbol, sector, industry FROM stock_list_fmp WHERE symbol IN ({symbols_str})").to_dicts()
-        meta_map = {m["symbol"]: m for m in meta}
-
-        total_value = sum(abs(p["market_value"]) for p in positions)
+        values = pl.DataFrame({"symbol": book.symbols, "value": np.abs(book.market_value)})
+        total_value = float(values["value"].sum())
         if total_value == 0: return {"sectors": [], "industries": []}
 
-        sector_map = {}
-        for p in positions:
-            m = meta_map.get(p["symbol"], {"sector": "Unknown", "industry": "Unknown"})
-            sec = m["sector"] or "Unknown"
-            sector_map[sec] = sector_map.get(sec, 0.0) + abs(p["market_value"])
-
-        sector_list = [
-            {"name": k, "value": v, "weight": v/total_value}
-            for k, v in sorted(sector_map.items(), key=lambda x: x[1], reverse=True)
-        ]
+        # Join + group in Polars instead of per-position dict lookups
+        sectors = (
+            values.join(meta, on="symbol", how="left")
+            .with_columns(
+                pl.when(pl.col("sector").is_null() | (pl.col("sector") == ""))
+                .then(pl.lit("Unknown"))
+                .otherwise(pl.col("sector"))
+                .alias("name")
+            )
+            .group_by("name", maintain_order=True)
+            .agg(pl.col("value").sum())
+            .sort("value", descending=True, maintain_order=True)
+            .with_columns((pl.col("value") / total_value).alias("weight"))
+        )
+        sector_list = sectors.to_dicts()
 
         return {"sectors": sector_list}
 
-    def get_portfolio_risk(self, positions: List[Dict[str, Any]], total_equity: float) -> Dict[str, Any]:
+    def get_portfolio_risk(self, positions: Positions, total_equity: float) -> Dict[str, Any]:
         """
         Get a structured summary of all portfolio risk metrics.
         """
+        # Extract the columns once; every metric below reads the same book
+        positions = PositionBook.of(positions)
+
+        # Serial on purpose: every metric shares one DuckDB connection, which is not safe to use
+        # from two threads, and the sector table is normally served from memory anyway.
+        # VaR runs the shared stats query; ES and volatility then hit the query cache
         var_95 = self.calculate_portfolio_var(positions, 0.95)
         es_95 = self.calculate_expected_shortfall(positions, 0.95)
+        volatility = self.calculate_portfolio_volatility(positions)
         exposure = self.get_portfolio_exposure(positions, total_equity)
         concentration = self.get_concentration_metrics(positions)
 
@@ -289,6 +493,7 @@ class RiskManager:
                 "var_95_usd": float(var_95),
                 "var_95_percent": float(var_95 / total_equity) if total_equity > 0 else 0.0,
                 "expected_shortfall_usd": float(es_95),
+                "volatility_annual_pct": float(volatility),
                 "total_equity": float(total_equity)
             },
             "exposure": exposure,
@@ -296,7 +501,7 @@ class RiskManager:
             "stress_tests": self.run_stress_test(positions, total_equity)
         }
 
-    def run_stress_test(self, positions: List[Dict[str, Any]], total_equity: float) -> List[Dict[str, Any]]:
+    def run_stress_test(self, positions: Positions, total_equity: float) -> List[Dict[str, Any]]:
         """
         Run multiple 'What-if' crash scenarios.
         """
@@ -307,27 +512,30 @@ class RiskManager:
             {"name": "NVDA Flash Crash", "symbol": "NVDA", "drop": -0.15}
         ]
 
-        results = []
-        for s in scenarios:
-            impact = 0.0
-            if "market_drop" in s:
-                # Impact = PortfolioValue * MarketDrop * PortfolioBeta
-                # Assuming portfolio beta of 1.1 for now
-                impact = total_equity * s["market_drop"] * s.get("beta", 1.1)
-            elif "symbol" in s:
-                # Specific symbol crash
-                for p in positions:
-                    if p["symbol"] == s["symbol"]:
-                        impact = p["market_value"] * s["drop"]
-
-            results.append({
+        # Each scenario shocks an exposure: the whole book for market moves
+        # (portfolio beta assumed 1.1 unless given), or one symbol's market value for a single-name crash
+        book = PositionBook.of(positions)
+        mv_by_symbol = dict(zip(book.symbols, book.market_value.tolist()))
+        exposure = np.array([
+            total_equity if "market_drop" in s else mv_by_symbol.get(s["symbol"], 0.0) for s in scenarios
+        ], dtype=np.float64)
+        shock = np.array([
+            s["market_drop"] * s.get("beta", 1.1) if "market_drop" in s else s["drop"] for s in scenarios
+        ], dtype=np.float64)
+
+        impacts = exposure * shock
+        impact_pct = impacts / total_equity if total_equity > 0 else np.zeros_like(impacts)
+        severe = np.abs(impact_pct) > 0.1
+
+        return [
+            {
                 "scenario": s["name"],
                 "impact_usd": float(impact),
-                "impact_percent": float(impact / total_equity) if total_equity > 0 else 0.0,
-                "status": "SEVERE" if abs(impact/total_equity) > 0.1 else "WARNING"
-            })
-
-        return results
+                "impact_percent": float(pct),
+                "status": "SEVERE" if is_severe else "WARNING"
+            }
+            for s, impact, pct, is_severe in zip(scenarios, impacts.tolist(), impact_pct.tolist(), severe.tolist())
+        ]
 
     def get_volatility_adjusted_size(self, portfolio_value: float, price: float, atr: float, risk_per_trade_pct: float = 0.01) -> int:
         """
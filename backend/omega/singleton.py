@@ -1,3 +1,4 @@
+import threading
 from typing import Optional
 
 from loguru import logger
@@ -5,6 +6,7 @@ from loguru import logger
 from omega.trading_app import TradingApp
 
 _omega_app_instance: Optional[TradingApp] = None
+_omega_app_lock = threading.Lock()
 
 def get_omega_app() -> TradingApp:
     """
@@ -12,18 +14,30 @@ def get_omega_app() -> TradingApp:
     Initializes it if it doesn't exist.
     """
     global _omega_app_instance
-    if _omega_app_instance is None:
+    # Fast path: one global load, no lock once initialized
+    app = _omega_app_instance
+    if app is not None:
+        return app
+
+    with _omega_app_lock:
+        # Re-check: a concurrent first request may have finished initializing
+        if _omega_app_instance is not None:
+            return _omega_app_instance
+
         logger.info("Initializing Omega Trading App Singleton...")
         # Default to paper trading for safety
-        _omega_app_instance = TradingApp(paper_trading=True)
+        app = TradingApp(paper_trading=True)
 
         # Attempt initial connection (safe, non-blocking if fails)
         try:
-            if _omega_app_instance.connect():
-                logger.info(f"Omega Singleton connected to {_omega_app_instance.broker_type}")
+            if app.connect():
+                logger.info(f"Omega Singleton connected to {app.broker_type}")
             else:
-                logger.warning(f"Omega Singleton failed to connect to {_omega_app_instance.broker_type} on startup")
+                logger.warning(f"Omega Singleton failed to connect to {app.broker_type} on startup")
         except Exception as e:
             logger.error(f"Omega Singleton connection error: {e}")
 
-    return _omega_app_instance
+        # Publish only after the connection attempt, so no caller sees a half-initialized app
+        _omega_app_instance = app
+
+    return app
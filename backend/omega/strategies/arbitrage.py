@@ -1,4 +1,6 @@
+import functools
 import json
+import math
 import sys
 from pathlib import Path
 
@@ -18,12 +20,62 @@ except ImportError:
 
 CONFIG_PATH = Path(__file__).parent / "configurations" / "live_arb_config.json"
 
+
+class ArbCore:
+    """
+    Per-tick arbitrage state: the three leg rates and their running product.
+    Kept free of ib_insync objects so the hot path is plain float arithmetic on slots.
+    """
+    __slots__ = ("rates", "product", "threshold", "rescales")
+
+    RESYNC_EVERY = 256 # Incremental rescales between full re-multiplications (bounds float drift)
+
+    def __init__(self, threshold: float):
+        self.rates = [None, None, None]
+        self.product = None
+        self.threshold = threshold
+        self.rescales = 0
+
+    def update(self, leg: int, rate) -> bool:
+        """Sets one leg's rate (None when it has no valid quote); True if the product is above threshold."""
+        rates = self.rates
+        old_rate = rates[leg]
+        if rate == old_rate:
+            return False
+        rates[leg] = rate
+
+        if rate is None:
+            self.product = None
+            return False
+
+        # Only one leg moved: rescale the cached product instead of re-multiplying all three,
+        # except every RESYNC_EVERY updates, when it is rebuilt so rounding error cannot accumulate
+        product = self.product
+        if product is not None and self.rescales < self.RESYNC_EVERY:
+            product = product / old_rate * rate
+            self.rescales += 1
+        elif None not in rates:
+            product = rates[0] * rates[1] * rates[2]
+            self.rescales = 0
+        else:
+            return False
+        self.product = product
+        return product > self.threshold
+
 class ArbitrageStrategy:
     def __init__(self, config_path=CONFIG_PATH):
         self.config = self._load_config(config_path)
         self.app = TradingApp(paper_trading=True) # Default to paper for safety
         self.tickers = {}
-        self.prices = {}
+
+        # Risk parameters read once; the tick handler compares against these directly
+        risk = self.config["risk_parameters"]
+        self._threshold = 1.0 + (risk["min_profit_bps"] / 10000.0)
+        self._usd_size = float(risk["max_position_size"])
+
+        # One arb at a time: set when the legs go out, cleared once every leg is done
+        self._in_flight = False
+        self._open_trades = ()
 
     def _load_config(self, path):
         with open(path, "r") as f:
@@ -76,79 +128,64 @@ class ArbitrageStrategy:
         loguru.logger.info("Qualifying contracts...")
         self.ib.qualifyContracts(*self.contracts.values())
 
+        self._leg_contracts = (c1, c2, c3)
+
+        # Order size increments, fetched once: EUR trades on legs 1 and 2, GBP on leg 3
+        step1, step2, step3 = (self._size_increment(c) for c in self._leg_contracts)
+        self._eur_step = math.lcm(step1, step2)
+        self._gbp_step = step3
+
+        # Latest ticker per leg; the rates and their product live in ArbCore
+        self._legs = [None, None, None]
+        self._core = ArbCore(self._threshold)
+
         # 4. Subscribe
-        loguru.logger.info("Subscribing to market data...")
-        for c in self.contracts.values():
-            self.ib.reqMktData(c)
+        # Tick-by-tick BidAsk streams every quote change; reqMktData only delivers ~250ms snapshots.
+        # Each leg's ticker dispatches straight to its handler, so no batch has to be searched for the leg that moved.
+        loguru.logger.info("Subscribing to tick-by-tick bid/ask...")
+        for leg, c in enumerate(self._leg_contracts):
+            ticker = self.ib.reqTickByTickData(c, "BidAsk", 0, False)
+            ticker.updateEvent += functools.partial(self._update_leg, leg)
 
-        # 5. Register Handler
-        self.ib.pendingTickersEvent += self.on_tick
+        # 5. Register Handlers
+        self.ib.orderStatusEvent += self._on_order_status
 
         # 6. Run Loop
         loguru.logger.info("Entering Event Loop...")
         self.ib.run()
 
-    def on_tick(self, tickers):
+    def _update_leg(self, leg, t):
         """
-        Event handler for market data updates.
+        Ticker update handler for one leg.
+        Path 1: Start USD -> Buy EUR (1/Ask EURUSD) -> Sell EUR for GBP (Bid EURGBP) -> Sell GBP for USD (Bid GBPUSD)
         """
-        # Update prices
-        for t in tickers:
-            symbol = t.contract.localSymbol # e.g. EUR.USD
-            # Map back to our keys?
-            # Or just store by contract object
-            self.prices[t.contract.symbol + t.contract.currency] = t
-
-        # Calculate Arb
-        # Formula: (1/EURUSD_Ask) * (EURGBP_Bid) * (GBPUSD_Bid)
-
-        p1 = self.contracts["p1"] # EURUSD
-        p2 = self.contracts["p2"] # EURGBP
-        p3 = self.contracts["p3"] # GBPUSD
-
-        t1 = self.prices.get(p1.symbol + p1.currency)
-        t2 = self.prices.get(p2.symbol + p2.currency)
-        t3 = self.prices.get(p3.symbol + p3.currency)
+        self._legs[leg] = t
 
-        if not (t1 and t2 and t3):
-            return
-
-        # Check for valid quotes
-        if not (t1.ask and t2.bid and t3.bid):
-            return
-
-        # Calculate Path 1
-        # Start USD -> Buy EUR (1/Ask EURUSD) -> Sell EUR for GBP (Bid EURGBP) -> Sell GBP for USD (Bid GBPUSD)
-
-        rate1 = 1.0 / t1.ask
-        rate2 = t2.bid
-        rate3 = t3.bid
+        # Leg rate: 1/Ask for EURUSD, Bid for EURGBP and GBPUSD
+        quote = t.ask if leg == 0 else t.bid
+        # ib_insync reports a missing side as NaN (truthy), which would poison the cached product
+        rate = (1.0 / quote if leg == 0 else quote) if quote and math.isfinite(quote) and quote > 0 else None
 
-        result = rate1 * rate2 * rate3
+        if self._core.update(leg, rate):
+            loguru.logger.success(f"ARB OPPORTUNITY: {self._core.product:.6f} > {self._threshold}")
+            self.execute_arb(self._legs[0], self._legs[1])
 
-        # Threshold
-        min_profit_bps = self.config["risk_parameters"]["min_profit_bps"]
-        threshold = 1.0 + (min_profit_bps / 10000.0)
+    def execute_arb(self, t1, t2):
+        """Sends the three legs, sized from the EURUSD / EURGBP tickers that triggered the signal."""
+        # A tick burst above threshold must not fire a second set of legs while the first is working
+        if self._in_flight:
+            return None
 
-        if result > threshold:
-            loguru.logger.success(f"ARB OPPORTUNITY: {result:.6f} > {threshold}")
-            self.execute_arb()
-
-    def execute_arb(self):
-        # Prevent re-entry?
         # Submit 3 market orders
         # 1. Buy EURUSD (Buy EUR)
         # 2. Sell EURGBP (Sell EUR)
         # 3. Sell GBPUSD (Sell GBP)
 
-        # Size?
-        # max_position_size (USD)
-        usd_size = self.config["risk_parameters"]["max_position_size"]
+        # Size: max_position_size (USD), rounded down to whole size increments so no leg is rejected for lot size
 
         # Order 1: Buy EURUSD. Quantity is EUR amount.
         # USD Size / EURUSD Rate
-        p1_rate = 1.0 / self.prices[self.contracts["p1"].symbol + self.contracts["p1"].currency].ask
-        qty1 = int(usd_size * p1_rate)
+        qty1 = int(self._usd_size / t1.ask) // self._eur_step * self._eur_step
 
         # Order 2: Sell EURGBP. Quantity is EUR amount.
         # Same qty of EUR? Yes.
@@ -156,24 +193,43 @@ class ArbitrageStrategy:
 
         # Order 3: Sell GBPUSD. Quantity is GBP amount.
         # EUR Amount * EURGBP Bid
-        p2_rate = self.prices[self.contracts["p2"].symbol + self.contracts["p2"].currency].bid
-        qty3 = int(qty2 * p2_rate)
+        qty3 = int(qty2 * t2.bid) // self._gbp_step * self._gbp_step
+
+        if not (qty1 and qty3):
+            loguru.logger.warning(f"Arb size below one lot (EUR {qty1}, GBP {qty3}); skipping.")
+            return None
+        self._in_flight = True
 
         orders = [
             MarketOrder("BUY", qty1),
             MarketOrder("SELL", qty2),
             MarketOrder("SELL", qty3)
         ]
-        contracts = [
-            self.contracts["p1"],
-            self.contracts["p2"],
-            self.contracts["p3"]
-        ]
 
-        loguru.logger.info(f"Executing Arb: {qty1} EUR -> {qty2} EUR -> {qty3} GBP")
+        # placeOrder only writes to the socket and returns, so the three legs go out
+        # back to back in this event-loop turn; logging waits until all are sent
+        try:
+            trades = [self.ib.placeOrder(c, o) for c, o in zip(self._leg_contracts, orders)]
+        except Exception:
+            self._in_flight = False
+            raise
+        self._open_trades = trades
 
-        for c, o in zip(contracts, orders):
-            self.ib.placeOrder(c, o)
+        loguru.logger.info(f"Executing Arb: {qty1} EUR -> {qty2} EUR -> {qty3} GBP")
+        return trades
+
+    def _size_increment(self, contract) -> int:
+        """Smallest order size step for a contract, from its contract details (1 if not reported)."""
+        details = self.ib.reqContractDetails(contract)
+        step = getattr(details[0], "sizeIncrement", None) if details else None
+        return int(step) if step and step >= 1 else 1
+
+    def _on_order_status(self, trade):
+        """Re-arms execute_arb once all legs reached a terminal status (filled, cancelled or rejected)."""
+        if self._in_flight and trade in self._open_trades and all(t.isDone() for t in self._open_trades):
+            self._in_flight = False
+            self._open_trades = ()
+            loguru.logger.info("Arb legs done; ready for next opportunity.")
 
 if __name__ == "__main__":
     strategy = ArbitrageStrategy()
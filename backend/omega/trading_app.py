@@ -4,17 +4,27 @@ Omega - Trading Application
 Main trading application for executing trades via Interactive Brokers.
 """
 
+import time
+from collections import deque
 from datetime import datetime
+from functools import cached_property
 from typing import Any, Dict, List, Optional
 
+import numpy as np
 from loguru import logger
 
 from config.registry import get_registry
 from config.settings import get_settings
 from omega.data.candle_engine import BarCloseEventBus, CandleAggregator
 from omega.risk_engine import RiskManager
+from qsconnect.database.duckdb_manager import DuckDBManager
 from qsresearch.governance.manager import GovernanceManager
 
+try:
+    from ib_insync import LimitOrder, MarketOrder
+except ImportError: # Optional: only the legacy direct-IB submit_order path needs it
+    LimitOrder = MarketOrder = None
+
 
 class PortfolioState:
     """Snapshot of current portfolio state."""
@@ -42,6 +52,12 @@ class TradingApp:
         >>> app.order_target_percent("AAPL", 0.05)
     """
 
+    POSITIONS_TTL_SEC = 0.25 # One broker fetch serves every lookup within a rebalance burst
+    ACCOUNT_TTL_SEC = 0.5 # Account summary reused across the orders of one rebalance batch
+    LATENCY_WINDOW = 1024 # Most recent order latencies kept for the health percentiles
+    STRATEGY_RETRY_SEC = 1.0 # Governance lookup rate while no strategy is approved
+    STRATEGY_REFRESH_SEC = 30.0 # Governance re-read while a strategy is active (picks up revocation/replacement)
+
     def __init__(
         self,
         host: Optional[str] = None,
@@ -65,10 +81,21 @@ class TradingApp:
         self.client_id = client_id or settings.ib_client_id
         self.paper_trading = paper_trading
 
+        # Order sizing config read once rather than per order (default $100)
+        self._min_order_threshold = settings.min_order_threshold_usd
+
         self._connected = False
         self._ib = None
         self._halted = False  # Critical safety flag
 
+        # Broker positions reused for POSITIONS_TTL_SEC, with a symbol index for get_position
+        self._positions_cache: Optional[List[Dict[str, Any]]] = None
+        self._positions_index: Dict[str, Dict[str, Any]] = {}
+        self._positions_ts = 0.0
+        # Account summary reused for ACCOUNT_TTL_SEC (sizing, risk gate and health share it)
+        self._account_cache: Optional[Dict[str, Any]] = None
+        self._account_ts = 0.0
+
         # Broker Adapter Strategy
         self.broker_type = settings.active_broker.upper()
         self.broker = None
@@ -87,33 +114,44 @@ class TradingApp:
             self.broker = IBBroker(self.host, self.port, self.client_id)
             logger.info("Initialized IBKR Broker Adapter")
 
-        # Governance & Strategy Layer
-        if not hasattr(self, '_db_manager'):
-            from qsconnect.database.duckdb_manager import DuckDBManager
-            self._db_manager = DuckDBManager(settings.duckdb_path)
-
-        self.gov = GovernanceManager(self._db_manager)
+        # Governance & Strategy Layer (DuckDB, governance and risk engine are built on first use)
         self.registry = get_registry()
-        self.risk_manager = RiskManager()
-        self.active_strategy: Optional[Dict[str, Any]] = None
+        self._strategy_retry_at = 0.0
+        self.active_strategy = None
 
         # --- Phase 3: Candle Truth Layer ---
         self.event_bus = BarCloseEventBus()
+        # Copy-on-write: only add_aggregator rebinds it, so readers iterate a dict no other thread mutates
         self.aggregators: Dict[str, CandleAggregator] = {}
 
         # Telemetry & Metrics
         self.metrics = {
             "last_tick_time": None,
             "last_order_time": None,
-            "order_latencies": [],
+            "order_latencies": deque(maxlen=self.LATENCY_WINDOW),
             "daily_pnl_initial_value": None
         }
+        # (p50, p99) of order_latencies; reset when a latency is recorded, recomputed on the next health read
+        self._latency_percentiles: Optional[tuple] = None
 
         logger.info(
             f"TradingApp initialized: {self.host}:{self.port} "
             f"(paper={self.paper_trading})"
         )
 
+    @cached_property
+    def _db_manager(self) -> DuckDBManager:
+        """Read-write DuckDB handle, opened (and schema-checked) only once governance needs it."""
+        return DuckDBManager(get_settings().duckdb_path)
+
+    @cached_property
+    def gov(self) -> GovernanceManager:
+        return GovernanceManager(self._db_manager)
+
+    @cached_property
+    def risk_manager(self) -> RiskManager:
+        return RiskManager()
+
     def set_broker(self, broker_type: str) -> bool:
         """
         Dynamically switch the active broker.
@@ -147,6 +185,7 @@ class TradingApp:
                 return False
 
             self.broker_type = broker_type
+            self._invalidate_portfolio()
 
             # Connect new
             if self.connect():
@@ -171,7 +210,9 @@ class TradingApp:
     def disconnect(self) -> None:
         """Disconnect from active broker."""
         # Adapter pattern doesn't strictly enforce disconnect, but good practice
-        pass
+        # Write out buffered forming bars; no further tick will trigger their flush
+        for agg in self.aggregators.values():
+            agg.flush()
 
     def is_connected(self) -> bool:
         """Check if connected to broker."""
@@ -191,12 +232,35 @@ class TradingApp:
         """Check if system is currently halted."""
         return self._halted
 
+    @property
+    def active_strategy(self) -> Optional[Dict[str, Any]]:
+        """The approved strategy orders are validated against (None if none is approved)."""
+        return self._active_strategy
+
+    @active_strategy.setter
+    def active_strategy(self, strategy: Optional[Dict[str, Any]]) -> None:
+        # Stored together with its expiry as a monotonic deadline, so each order compares floats
+        # and no strategy is ever checked against another one's deadline
+        now = time.monotonic()
+        ttl_expiry = strategy.get("ttl_expiry") if strategy else None
+        self._strategy_expiry_mono = (
+            now + (ttl_expiry - datetime.now()).total_seconds() if ttl_expiry else float("inf")
+        )
+        if strategy:
+            self._strategy_retry_at = now + self.STRATEGY_REFRESH_SEC
+        self._active_strategy = strategy
+
     # =====================
     # Account Information
     # =====================
 
     def get_account_info(self) -> Dict[str, Any]:
-        return self.broker.get_account_info()
+        now = time.monotonic()
+        if self._account_cache is not None and now - self._account_ts < self.ACCOUNT_TTL_SEC:
+            return self._account_cache
+
+        self._account_cache, self._account_ts = self.broker.get_account_info(), now
+        return self._account_cache
 
     def get_portfolio_value(self) -> float:
         info = self.get_account_info()
@@ -214,14 +278,29 @@ class TradingApp:
     # =====================
 
     def get_positions(self) -> List[Dict[str, Any]]:
-        return self.broker.get_positions()
+        now = time.monotonic()
+        if self._positions_cache is not None and now - self._positions_ts < self.POSITIONS_TTL_SEC:
+            return self._positions_cache
 
-    def get_position(self, symbol: str) -> Optional[Dict[str, Any]]:
-        positions = self.get_positions()
+        positions = self.broker.get_positions()
+        index: Dict[str, Dict[str, Any]] = {}
         for pos in positions:
-            if pos["symbol"] == symbol:
-                return pos
-        return None
+            # Tag asset_class once here so risk checks compare a dict field instead of re-querying the registry
+            if "asset_class" not in pos:
+                pos["asset_class"] = self.registry.get_asset_class(pos["symbol"])
+            index.setdefault(pos["symbol"], pos)
+
+        self._positions_cache, self._positions_index, self._positions_ts = positions, index, now
+        return positions
+
+    def get_position(self, symbol: str) -> Optional[Dict[str, Any]]:
+        self.get_positions()
+        return self._positions_index.get(symbol)
+
+    def _invalidate_portfolio(self) -> None:
+        """Forces the next get_positions()/get_account_info() to hit the broker (after an order changes the book)."""
+        self._positions_cache = None
+        self._account_cache = None
 
     # =====================
     # Order Execution
@@ -231,10 +310,19 @@ class TradingApp:
         # Legacy support / Helper if needed, but preferably move to broker adapter
         return None # Deprecated in favor of adapter
 
-    def _validate_risk(self, symbol: str, shares: int, current_price: float, side: str) -> bool:
+    def _validate_risk(
+        self,
+        symbol: str,
+        shares: int,
+        current_price: float,
+        side: str,
+        state: Optional[PortfolioState] = None,
+        quote: Optional[Dict[str, float]] = None,
+    ) -> bool:
         """
         Internal pre-trade risk validation.
         Delegates to the centralized RiskManager engine.
+        Callers that already hold the portfolio state and quote pass them in to avoid refetching.
         
         Returns:
             True if trade is safe to proceed
@@ -244,7 +332,11 @@ class TradingApp:
             return False
 
         # --- Governance Check: Staged Deployment & Expiry ---
-        if not self.active_strategy:
+        now = time.monotonic()
+        if now >= self._strategy_retry_at:
+            # Re-query once per STRATEGY_RETRY_SEC without a strategy; the setter defers it to
+            # STRATEGY_REFRESH_SEC once one is found, so a revoked strategy stops without a restart
+            self._strategy_retry_at = now + self.STRATEGY_RETRY_SEC
             self.active_strategy = self.gov.get_active_strategy()
 
         if not self.active_strategy:
@@ -252,7 +344,7 @@ class TradingApp:
             return False
 
         # Check Expiry
-        if datetime.now() > self.active_strategy.get("ttl_expiry", datetime.max):
+        if now > self._strategy_expiry_mono:
             logger.error(f"RISK REJECTED: Strategy {self.active_strategy['strategy_hash'][:8]} has EXPIRED")
             self._halted = True # Fail safe
             return False
@@ -268,9 +360,11 @@ class TradingApp:
             return False
 
         # --- Centralized Risk Engine Call ---
-        portfolio_value = self.get_portfolio_value()
-        current_positions = self.get_positions()
-        account_info = self.get_account_info()
+        if state is None:
+            state = self.get_portfolio_state()
+        portfolio_value = state.total_equity
+        current_positions = state.positions
+        account_info = state.account
         asset_class = self.registry.get_asset_class(symbol)
 
         # Calculate Real-Time Daily P&L for Risk Check
@@ -279,7 +373,8 @@ class TradingApp:
              current_pnl = portfolio_value - self.metrics["daily_pnl_initial_value"]
 
         # Liquidity Check (Spread)
-        quote = self.get_quote(symbol)
+        if quote is None:
+            quote = self.get_quote(symbol)
         is_liquid, spread_msg = self.risk_manager.validate_spread(symbol, quote["bid"], quote["ask"])
         if not is_liquid:
              logger.error(f"RISK REJECTED: Liquidity check failed for {symbol}: {spread_msg}")
@@ -343,33 +438,37 @@ class TradingApp:
         symbol: str,
         target_percent: float,
         order_type: str = "ADAPTIVE",
+        quote: Optional[Dict[str, float]] = None,
     ) -> Optional[Any]:
         """
         Place order to reach target portfolio percentage.
+        A caller holding a live quote ({bid, ask, last}) can pass it to skip the broker quote request;
+        the same quote feeds the spread check.
         """
         if not self.is_connected():
             if not self.connect():
                 return None
 
-        # Get portfolio value
-        portfolio_value = self.get_portfolio_value()
+        # One account + positions read, shared with the risk gate below
+        state = self.get_portfolio_state()
+        portfolio_value = state.total_equity
         target_value = portfolio_value * target_percent
 
-        # Get current position
+        # Get current position (served from the positions just fetched)
         current_pos = self.get_position(symbol)
         current_value = current_pos["market_value"] if current_pos else 0.0
 
         # Calculate difference
         diff_value = target_value - current_value
 
-        # Configurable minimum order threshold (default $100)
-        min_order_threshold = getattr(get_settings(), 'min_order_threshold', 100)
-        if abs(diff_value) < min_order_threshold:
+        # Configurable minimum order threshold
+        if abs(diff_value) < self._min_order_threshold:
             logger.info(f"Skipping {symbol}: difference too small (${diff_value:.2f})")
             return None
 
         # Get current price
-        quote = self.get_quote(symbol)
+        if quote is None:
+            quote = self.get_quote(symbol)
         current_price = quote.get("last", 0.0) or quote.get("ask", 0.0) # Fallback
 
         if current_price <= 0:
@@ -387,18 +486,18 @@ class TradingApp:
         shares = abs(shares)
 
         # --- Pre-Trade Risk Gate ---
-        import time
-        start_time = time.time()
+        start_ns = time.perf_counter_ns()
 
-        if not self._validate_risk(symbol, shares, current_price, action):
+        if not self._validate_risk(symbol, shares, current_price, action, state=state, quote=quote):
             return None
 
         # Submit via Broker Adapter
         trade = self.broker.submit_order(symbol, shares, action, order_type, current_price)
+        self._invalidate_portfolio()
 
-        # Telemetry
-        latency = (time.time() - start_time) * 1000
-        self.metrics["order_latencies"].append(latency)
+        # Telemetry (integer nanoseconds; converted to ms when reported)
+        self.metrics["order_latencies"].append(time.perf_counter_ns() - start_ns)
+        self._latency_percentiles = None
 
         return trade
 
@@ -439,8 +538,6 @@ class TradingApp:
         if self._ib is None:
             return None
 
-        from ib_insync import LimitOrder, MarketOrder
-
         contract = self.create_contract(symbol)
 
         if order_type.upper() == "MKT":
@@ -450,6 +547,7 @@ class TradingApp:
             ib_order = LimitOrder(side, abs(quantity), price)
 
         trade = self._ib.placeOrder(contract, ib_order)
+        self._invalidate_portfolio()
 
         logger.info(f"Submitted order: {side} {quantity} {symbol}")
 
@@ -503,14 +601,15 @@ class TradingApp:
             else:
                 daily_pnl = 0.0
 
+        aggregators = self.aggregators
         status = {
             "ib_connected": self.is_connected(),
             "engine_halted": self._halted,
             "last_heartbeat": datetime.now().isoformat(),
             "latency_p50_ms": 0.0,
             "latency_p99_ms": 0.0,
-            "truth_layer_active": len(self.aggregators) > 0,
-            "active_symbols": list(self.aggregators.keys()),
+            "truth_layer_active": len(aggregators) > 0,
+            "active_symbols": list(aggregators.keys()),
             "portfolio_var_95_usd": risk_summary["var_95_usd"],
             "portfolio_var_95_percent": risk_summary["var_95_percent"],
             "portfolio_es_95_usd": risk_summary["expected_shortfall_usd"],
@@ -520,18 +619,27 @@ class TradingApp:
         }
 
         if self.metrics["order_latencies"]:
-            import numpy as np
-            status["latency_p50_ms"] = float(np.percentile(self.metrics["order_latencies"], 50))
-            status["latency_p99_ms"] = float(np.percentile(self.metrics["order_latencies"], 99))
+            if self._latency_percentiles is None:
+                # One call: percentile selects both ranks by partitioning, no full sort
+                p50, p99 = np.percentile(np.fromiter(self.metrics["order_latencies"], dtype=np.float64), [50, 99]) / 1e6
+                self._latency_percentiles = (float(p50), float(p99))
+            status["latency_p50_ms"], status["latency_p99_ms"] = self._latency_percentiles
 
         return status
 
+    def add_aggregator(self, symbol: str, aggregator: CandleAggregator) -> CandleAggregator:
+        """Registers a symbol's aggregator (first one wins) by publishing a new dict."""
+        aggregators = self.aggregators
+        if symbol not in aggregators:
+            self.aggregators = {**aggregators, symbol: aggregator}
+        return self.aggregators[symbol]
+
     def get_live_candles(self) -> Dict[str, Dict[str, Any]]:
         """Returns the current forming candle state for all active symbols."""
         results = {}
         for symbol, agg in self.aggregators.items():
-            if agg.current_candle:
-                c = agg.current_candle
+            c = agg.current_candle
+            if c:
                 results[symbol] = {
                     "start_ts": c.start_ts,
                     "open": c.open,
@@ -547,11 +655,9 @@ class TradingApp:
         Emergency: Liquidate all positions immediately.
         """
         logger.warning("EMERGENCY: Flattening all positions!")
-        positions = self.get_positions()
-        count = 0
-        for pos in positions:
-            self.liquidate_position(pos["symbol"])
-            count += 1
+        # One batch call on the broker, not a quote + risk gate round trip per symbol
+        count = self.broker.close_all_positions()
+        self._invalidate_portfolio()
         return count
     def run_blocking(self) -> None:
         """
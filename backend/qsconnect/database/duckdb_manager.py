@@ -798,20 +798,20 @@ class DuckDBManager:
     # Query Core
     # =====================
 
-    def query(self, sql: str) -> pl.DataFrame:
+    def query(self, sql: str, params: Optional[Any] = None) -> pl.DataFrame:
         """Execute a SQL query. Attempts read-only first for maximum concurrency."""
         try:
             # Try read-only connection first
             conn = self.connect(read_only=True)
             try:
-                return conn.execute(sql).pl()
+                return (conn.execute(sql, params) if params else conn.execute(sql)).pl()
             finally:
                 conn.close()
         except Exception:
             # Fallback to instance default (might be read-write)
             conn = self.connect()
             try:
-                return conn.execute(sql).pl()
+                return (conn.execute(sql, params) if params else conn.execute(sql)).pl()
             finally:
                 conn.close()
 
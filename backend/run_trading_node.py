@@ -20,12 +20,12 @@ def run_simulation(app):
     # Simulation bypasses IBKR subscription, so we init manually
     if symbol not in app.aggregators:
         from omega.data.candle_engine import CandleAggregator
-        app.aggregators[symbol] = CandleAggregator(
+        app.add_aggregator(symbol, CandleAggregator(
             symbol=symbol,
             interval_sec=60, # 1 min bars
             event_bus=app.event_bus,
             db_mgr=app._db_manager
-        )
+        ))
 
     agg = app.aggregators[symbol]
 
@@ -52,6 +52,8 @@ def run_simulation(app):
 
     except KeyboardInterrupt:
         logger.info("Simulation Stopped.")
+    finally:
+        app.disconnect()
 
 def main():
     logger.info("Starting Omega Trading Node...")
@@ -91,6 +93,7 @@ def main():
     except KeyboardInterrupt:
         logger.info("Stopping Trading Node...")
         app.cancel_all_orders()
+        app.disconnect()
 
 if __name__ == "__main__":
     main()
@@ -82,6 +82,9 @@ def main():
     except KeyboardInterrupt:
         print("\n🛑 Stopped Mock Feed.")
     finally:
+        # Buffered forming bars are only written on later ticks or the timer; write them now
+        for agg in aggs.values():
+            agg.flush()
         db_mgr.close()
 
 if __name__ == "__main__":
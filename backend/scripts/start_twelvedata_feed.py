@@ -3,12 +3,12 @@ Twelve Data Real-Time Feed
 Uses WebSocket to stream real-time price quotes and feed them to the dashboard.
 API Key provided by user.
 """
-import json
 import os
 import sys
 import time
 from pathlib import Path
 
+import orjson
 import websocket
 
 # Add project root
@@ -39,7 +39,8 @@ AGGREGATORS = {}
 
 def on_message(ws, message):
     try:
-        data = json.loads(message)
+        # orjson parses the str/bytes frame directly, several times faster than stdlib json
+        data = orjson.loads(message)
         event = data.get("event")
 
         # Twelve Data 'price' event (Quote)
@@ -99,7 +100,7 @@ def on_open(ws):
             "symbols": ",".join(SYMBOLS)
         }
     }
-    ws.send(json.dumps(payload))
+    ws.send(orjson.dumps(payload).decode())
 
 def main():
     print("🚀 Starting Twelve Data Real-Time Feed...")
@@ -118,26 +119,31 @@ def main():
     # Run WebSocket with reconnection logic
     ws_url = f"wss://ws.twelvedata.com/v1/quotes/price?apikey={API_KEY}"
 
-    while True:
-        print("Connecting to Twelve Data...")
-        ws = websocket.WebSocketApp(
-            ws_url,
-            on_open=on_open,
-            on_message=on_message,
-            on_error=on_error,
-            on_close=on_close
-        )
-
-        try:
-            ws.run_forever()
-        except KeyboardInterrupt:
-            print("\n🛑 Stopped by user.")
-            break
-        except Exception as e:
-            print(f"\n⚠️ WS Crash: {e}")
+    try:
+        while True:
+            print("Connecting to Twelve Data...")
+            ws = websocket.WebSocketApp(
+                ws_url,
+                on_open=on_open,
+                on_message=on_message,
+                on_error=on_error,
+                on_close=on_close
+            )
 
-        print("Waiting 5s before reconnecting...")
-        time.sleep(5)
+            try:
+                ws.run_forever()
+            except KeyboardInterrupt:
+                print("\n🛑 Stopped by user.")
+                break
+            except Exception as e:
+                print(f"\n⚠️ WS Crash: {e}")
+
+            print("Waiting 5s before reconnecting...")
+            time.sleep(5)
+    finally:
+        # Write out the forming bars still buffered for the DB
+        for agg in AGGREGATORS.values():
+            agg.flush()
 
 if __name__ == "__main__":
     main()
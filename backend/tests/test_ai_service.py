@@ -0,0 +1,95 @@
+"""
+Tests for AI Service
+
+Tests the rule-based pre-classifiers that answer obvious cases without an LLM call.
+"""
+
+import asyncio
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from omega import ai_service
+from omega.ai_service import MarketAnalyst
+
+
+class TestFastRegime:
+    """Test deterministic regime classification."""
+
+    def test_thin_volume_is_low_liquidity(self):
+        result = MarketAnalyst._fast_regime({"price": 100.0, "rvol": 0.1})
+        assert result["regime"] == "LOW_LIQUIDITY"
+
+    def test_large_volatility_is_high_volatility(self):
+        result = MarketAnalyst._fast_regime({"price": 100.0, "volatility": 4.0, "rvol": 1.0})
+        assert result["regime"] == "HIGH_VOLATILITY"
+
+    def test_volume_surge_away_from_vwap_is_breakout(self):
+        snapshot = {"price": 100.0, "volatility": 0.5, "rvol": 3.5, "price_vs_vwap_pct": 1.8}
+        assert MarketAnalyst._fast_regime(snapshot)["regime"] == "BREAKOUT"
+
+    def test_ambiguous_snapshot_defers_to_llm(self):
+        snapshot = {"price": 100.0, "volatility": 0.8, "rvol": 1.2, "price_vs_vwap_pct": 0.2}
+        assert MarketAnalyst._fast_regime(snapshot) is None
+
+
+class TestFastRisk:
+    """Test deterministic risk guardrail."""
+
+    def test_wide_spread_is_high_risk(self):
+        assert MarketAnalyst._fast_risk({"spread_pct": 0.8})["risk_level"] == "HIGH"
+
+    def test_calm_liquid_market_is_low_risk(self):
+        snapshot = {"price": 100.0, "spread_pct": 0.02, "rvol": 1.1, "atr_pct": 0.6}
+        assert MarketAnalyst._fast_risk(snapshot)["risk_level"] == "LOW"
+
+    def test_missing_fields_defer_to_llm(self):
+        assert MarketAnalyst._fast_risk({"price": 100.0, "rvol": 1.1}) is None
+
+
+def test_detect_regime_short_circuits_llm():
+    """An obvious case is answered without touching the LLM client."""
+    with patch.object(MarketAnalyst, '__init__', lambda x: None):
+        analyst = MarketAnalyst()
+        analyst._fast_stats = {"calls": 0, "hits": 0}
+        analyst._call_llm = MagicMock()
+
+        result = analyst.detect_regime("AAPL", {"price": 100.0, "rvol": 0.1})
+
+        assert result["regime"] == "LOW_LIQUIDITY"
+        analyst._call_llm.assert_not_called()
+        assert analyst._fast_stats == {"calls": 1, "hits": 1}
+
+
+def test_aiohttp_session_reused_per_loop_and_closed_after_loop_ends():
+    """One session per running loop; a session left by a finished loop is closed, not leaked."""
+    pytest.importorskip("aiohttp")
+
+    async def first_loop():
+        session = await ai_service._aiohttp_session()
+        assert await ai_service._aiohttp_session() is session
+        return session
+
+    async def second_loop(stale):
+        session = await ai_service._aiohttp_session()
+        assert session is not stale and stale.closed
+        await ai_service.close_aiohttp_sessions()
+        assert session.closed
+
+    asyncio.run(second_loop(asyncio.run(first_loop())))
+
+
+def test_async_client_shared_across_instances_per_loop():
+    """force_refresh builds a new analyst but reuses the running loop's async client and its pool."""
+    def analyst():
+        with patch.object(MarketAnalyst, '__init__', lambda x: None):
+            a = MarketAnalyst()
+        a.provider, a.api_key, a.client = "openai", "sk-test", MagicMock()
+        return a
+
+    async def clients():
+        first, second = analyst().aclient, analyst().aclient
+        assert first is second
+        return first
+
+    assert asyncio.run(clients()) is not asyncio.run(clients())
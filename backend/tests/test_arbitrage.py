@@ -0,0 +1,51 @@
+"""
+Tests for Arbitrage Strategy
+
+Tests the incremental triangular-arbitrage signal.
+"""
+
+import math
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+pytest.importorskip("ib_insync")
+
+from omega.strategies.arbitrage import ArbCore, ArbitrageStrategy
+
+
+def _quote(bid, ask):
+    return SimpleNamespace(bid=bid, ask=ask)
+
+
+def test_nan_quote_does_not_stall_signal():
+    """A missing side (NaN) drops the product; valid quotes afterwards re-arm the signal."""
+    with patch.object(ArbitrageStrategy, '__init__', lambda x, **kwargs: None):
+        strategy = ArbitrageStrategy()
+        strategy._threshold = 1.0
+        strategy._legs = [None, None, None]
+        strategy._core = ArbCore(1.0)
+        strategy.execute_arb = MagicMock()
+
+        strategy._update_leg(0, _quote(1.0, 1.0))
+        strategy._update_leg(1, _quote(1.0, 1.0))
+        strategy._update_leg(2, _quote(1.0, 1.0))
+        strategy._update_leg(1, _quote(math.nan, 1.0))
+        assert strategy._core.product is None
+
+        strategy._update_leg(1, _quote(1.01, 1.02))
+        strategy.execute_arb.assert_called_once()
+        assert strategy._core.product == pytest.approx(1.01)
+
+
+def test_product_resynced_periodically():
+    """After RESYNC_EVERY rescales the product is rebuilt from the leg rates."""
+    core = ArbCore(2.0)
+    core.update(0, 0.9)
+    core.update(1, 0.85)
+    for i in range(ArbCore.RESYNC_EVERY + 2):
+        core.update(2, 1.1 + (i % 7) * 1e-5)
+
+    rates = core.rates
+    assert core.product == rates[0] * rates[1] * rates[2]
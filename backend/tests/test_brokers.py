@@ -0,0 +1,96 @@
+"""
+Tests for Broker Adapters
+
+Checks that every adapter honours the single BaseBroker contract.
+"""
+
+import inspect
+
+import pytest
+
+from omega.broker.alpaca import AlpacaBroker
+from omega.broker.base import BaseBroker
+from omega.broker.ibkr import IBBroker
+
+ADAPTERS = [AlpacaBroker, IBBroker]
+CONTRACT = sorted(BaseBroker.__abstractmethods__)
+
+
+@pytest.mark.parametrize("adapter", ADAPTERS)
+def test_adapter_implements_every_abstract_method(adapter):
+    """Adapters must be instantiable, i.e. leave no abstract method unimplemented."""
+    assert issubclass(adapter, BaseBroker)
+    assert not getattr(adapter, "__abstractmethods__", set())
+
+
+@pytest.mark.parametrize("adapter", ADAPTERS)
+@pytest.mark.parametrize("name", CONTRACT)
+def test_adapter_matches_sync_contract(adapter, name):
+    """Contract methods are sync; an async override would silently return a coroutine."""
+    assert not inspect.iscoroutinefunction(getattr(adapter, name))
+
+
+@pytest.mark.parametrize("adapter", ADAPTERS)
+def test_snapshot_is_coroutine(adapter):
+    """The concurrent snapshot is the one async entry point on every adapter."""
+    assert inspect.iscoroutinefunction(adapter.snapshot)
+
+
+def test_ibkr_close_all_cancels_then_routes_fx_to_idealpro():
+    """Working orders are cancelled before closing; FX legs route to IDEALPRO on a copied contract."""
+    from types import SimpleNamespace
+    from unittest.mock import MagicMock
+
+    ib_insync = pytest.importorskip("ib_insync")
+
+    fx = ib_insync.Contract(secType="CASH", symbol="EUR", currency="USD")
+    stock = ib_insync.Contract(secType="STK", symbol="AAPL", currency="USD")
+
+    broker = IBBroker("127.0.0.1", 7497, 1)
+    broker._connected = True
+    broker._ib = MagicMock()
+    broker._ib.positions.return_value = [
+        SimpleNamespace(contract=fx, position=20000),
+        SimpleNamespace(contract=stock, position=-10),
+    ]
+
+    assert broker.close_all_positions() == 2
+
+    names = [call[0] for call in broker._ib.mock_calls]
+    assert names.index("reqGlobalCancel") < names.index("placeOrder")
+    routed = [call.args[0].exchange for call in broker._ib.placeOrder.call_args_list]
+    assert routed == ["IDEALPRO", "SMART"]
+    assert fx.exchange == "" and stock.exchange == ""
+
+
+def test_alpaca_close_all_cancels_working_orders():
+    """The Alpaca flatten cancels resting orders in the same request, like the IBKR global cancel."""
+    from unittest.mock import MagicMock
+
+    broker = AlpacaBroker("key", "secret")
+    broker._connected = True
+    broker._api = MagicMock()
+    broker._api.delete.return_value = [{"symbol": "AAPL", "status": 200}, {"symbol": "MSFT", "status": 200}]
+
+    assert broker.close_all_positions() == 2
+    broker._api.delete.assert_called_once_with("/positions", {"cancel_orders": "true"})
+    broker._api.close_all_positions.assert_not_called()
+
+
+def test_ibkr_fx_quote_ready_without_last():
+    """An FX ticker with bid/ask but a NaN last is ready at once and quotes the midpoint."""
+    import math
+    from types import SimpleNamespace
+    from unittest.mock import MagicMock
+
+    broker = IBBroker("127.0.0.1", 7497, 1)
+    broker._connected = True
+    broker._ib = MagicMock()
+    broker._contracts["EURUSD"] = MagicMock()
+    broker._ib.reqMktData.return_value = SimpleNamespace(bid=1.1, ask=1.1002, last=math.nan, volume=math.nan)
+
+    quote = broker.get_quote("EURUSD")
+
+    broker._ib.waitOnUpdate.assert_not_called()
+    assert quote["last"] == pytest.approx(1.1001)
+    assert quote["volume"] == 0.0
@@ -1,5 +1,8 @@
+import threading
 import time
+from unittest.mock import MagicMock
 
+import numpy as np
 import pytest
 
 from omega.data.candle_engine import CandleAggregator, SessionManager, Tick
@@ -55,3 +58,103 @@ def test_timestamp_quantization(aggregator):
 
     assert aggregator.current_candle.volume == 20
     assert aggregator.current_candle.close == 100.1
+
+def test_db_writes_coalesce_per_bar():
+    """Verify that forming-bar updates are buffered and a final bar is flushed at once."""
+    db = MagicMock()
+    cursor = db.connect.return_value
+    agg = CandleAggregator(symbol="AAPL", interval_sec=60, session_mgr=MockSessionManager(), db_mgr=db)
+
+    # Forming-bar updates are buffered for the background flusher
+    for i in range(5):
+        agg.process_tick(Tick("AAPL", 100.0 + i, 10, 1000.0 + i, time.time()))
+    assert cursor.executemany.call_count == 0
+    assert len(agg._pending) == 1
+
+    # Rolling into the next bar finalizes and flushes the buffered bar in one write
+    agg.process_tick(Tick("AAPL", 101.0, 10, 1060.0, time.time()))
+    written = cursor.executemany.call_args_list[-1].args[1][-1]
+    assert written[6] == 50 and written[7] is True
+    assert len(agg._pending) == 1 # the new forming bar
+
+def test_batch_path_matches_scalar_path():
+    """process_ticks must finalize the same bars as feeding ticks one by one."""
+    ts = np.array([1000.0, 1010.5, 1019.9, 1021.0, 1030.0, 1200.0, 1201.0])
+    price = np.array([100.0, 102.0, 99.0, 101.0, 103.0, 98.0, 97.0])
+    size = np.array([10.0, 0.0, 5.0, 7.0, 3.0, 2.0, 4.0])
+
+    scalar = CandleAggregator("AAPL", 60, session_mgr=MockSessionManager())
+    batch = CandleAggregator("AAPL", 60, session_mgr=MockSessionManager())
+    scalar_bars, batch_bars = [], []
+    scalar.event_bus.subscribe(scalar_bars.append)
+    batch.event_bus.subscribe(batch_bars.append)
+
+    for t, p, s in zip(ts, price, size):
+        scalar.process_tick(Tick("AAPL", p, s, t, t))
+    batch.process_ticks(ts, price, size)
+
+    ohlcv = lambda c: (c.start_ts, c.open, c.high, c.low, c.close, c.volume)
+    assert [ohlcv(c) for c in batch_bars] == [ohlcv(c) for c in scalar_bars]
+    assert ohlcv(batch.current_candle) == ohlcv(scalar.current_candle)
+    assert batch.last_finalized_ts == scalar.last_finalized_ts
+
+def test_emitted_bar_is_not_mutated_by_next_bar(aggregator):
+    """The live bar is pooled, so subscribers must receive an independent copy."""
+    closed = []
+    aggregator.event_bus.subscribe(closed.append)
+
+    aggregator.process_tick(Tick("AAPL", 100.0, 10, 1000.0, 1000.0))
+    aggregator.process_tick(Tick("AAPL", 105.0, 20, 1030.0, 1030.0))
+    aggregator.process_tick(Tick("AAPL", 90.0, 5, 1035.0, 1035.0))
+
+    assert closed[0].is_final and closed[0].close == 100.0 and closed[0].volume == 10
+    assert not aggregator.current_candle.is_final
+
+def test_session_checked_once_per_minute():
+    """Ticks within the same minute reuse the aggregator's last session answer."""
+    session = MagicMock(spec=SessionManager)
+    session.is_in_session.return_value = True
+    agg = CandleAggregator("AAPL", 60, session_mgr=session)
+
+    for ts in (1000.0, 1010.0, 1019.0, 1020.0, 1050.0):
+        agg.process_tick(Tick("AAPL", 100.0, 1, ts, ts))
+
+    assert session.is_in_session.call_count == 2
+    assert agg.current_candle.volume == 2
+
+def test_forming_bar_flushed_when_ticks_stop():
+    """A buffered update is written by the background flusher even if no later tick arrives."""
+    from omega.data.candle_engine import DB_FLUSH_INTERVAL_SEC
+
+    db = MagicMock()
+    cursor = db.connect.return_value
+    agg = CandleAggregator(symbol="AAPL", interval_sec=60, session_mgr=MockSessionManager(), db_mgr=db)
+
+    agg.process_tick(Tick("AAPL", 100.0, 10, 1000.0, time.time()))
+    agg.process_tick(Tick("AAPL", 100.5, 10, 1001.0, time.time()))
+    assert len(agg._pending) == 1
+
+    deadline = time.monotonic() + DB_FLUSH_INTERVAL_SEC * 8
+    while cursor.executemany.call_count < 1 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not agg._pending
+    assert cursor.executemany.call_args_list[-1].args[1][-1][5] == 100.5
+
+
+def test_quiet_aggregators_share_one_flusher_thread():
+    """Many aggregators buffering at once add at most one flusher thread, and every bar is written."""
+    db = MagicMock()
+    cursor = db.connect.return_value
+    before = threading.active_count()
+    aggs = [
+        CandleAggregator(symbol=f"SYM{i}", interval_sec=60, session_mgr=MockSessionManager(), db_mgr=db)
+        for i in range(20)
+    ]
+    for agg in aggs:
+        agg.process_tick(Tick(agg.symbol, 100.0, 10, 1000.0, time.time()))
+    assert threading.active_count() - before <= 1
+
+    deadline = time.monotonic() + 2.0
+    while any(agg._pending for agg in aggs) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not any(agg._pending for agg in aggs)
@@ -0,0 +1,22 @@
+"""
+Tests for Asset Registry
+
+Checks symbol lookups against a temporary assets.yaml.
+"""
+
+from config.registry import AssetRegistry
+
+
+def test_asset_class_lookup_follows_reload(tmp_path):
+    """The flattened asset_class table is rebuilt whenever the YAML is reloaded."""
+    config = tmp_path / "assets.yaml"
+    config.write_text("ASSETS:\n  AAPL:\n    asset_class: EQUITY\n  EURUSD: {}\n")
+
+    registry = AssetRegistry(config_path=config)
+    assert registry.get_asset_class("AAPL") == "EQUITY"
+    assert registry.get_asset_class("EURUSD") == "UNKNOWN"
+    assert registry.get_asset_class("TSLA") == "UNKNOWN"
+
+    config.write_text("ASSETS:\n  AAPL:\n    asset_class: ETF\n")
+    registry.load()
+    assert registry.get_asset_class("AAPL") == "ETF"
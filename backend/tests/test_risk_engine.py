@@ -1,6 +1,17 @@
 
+import os
+import threading
+import time
+from datetime import date, timedelta
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import duckdb
+import numpy as np
+import polars as pl
 import pytest
 
+from omega import risk_engine
 from omega.risk_engine import RiskManager
 
 
@@ -21,6 +32,35 @@ EXECUTION_AUTHORITY:
 """)
     return RiskManager(limits_path=limits_file)
 
+@pytest.fixture
+def prices_db(tmp_path, monkeypatch):
+    """A DuckDB file with a year of random-walk closes for three symbols."""
+    db_path = tmp_path / "prices.duckdb"
+    rng = np.random.default_rng(0)
+    rows = []
+    for symbol in ["AAPL", "MSFT", "GLD"]:
+        closes = 100 * np.cumprod(1 + rng.normal(0, 0.01, 250))
+        rows += [(symbol, date.today() - timedelta(days=250 - i), float(c)) for i, c in enumerate(closes)]
+
+    con = duckdb.connect(str(db_path))
+    con.execute("CREATE TABLE historical_prices_fmp (symbol VARCHAR, date DATE, close DOUBLE)")
+    con.executemany("INSERT INTO historical_prices_fmp VALUES (?, ?, ?)", rows)
+    returns = con.execute("""
+        SELECT symbol, date, (close / lag(close) OVER (PARTITION BY symbol ORDER BY date)) - 1 as r
+        FROM historical_prices_fmp
+    """).pl().drop_nulls()
+    con.close()
+
+    monkeypatch.setattr(risk_engine, "get_settings", lambda: SimpleNamespace(duckdb_path=db_path))
+    risk_engine._RISK_QUERY_CACHE.clear()
+    return returns.pivot(values="r", index="date", on="symbol").sort("date")
+
+POSITIONS = [
+    {"symbol": "AAPL", "market_value": 50000},
+    {"symbol": "MSFT", "market_value": -20000},
+    {"symbol": "GLD", "market_value": 30000},
+]
+
 def test_execution_authority(risk_mgr):
     # Valid: EQUITY is in IBKR authority
     is_valid, reason = risk_mgr.validate_order(
@@ -43,6 +83,14 @@ def test_symbol_exposure_limit(risk_mgr):
     assert not is_valid
     assert "Symbol exposure" in reason
 
+def test_sell_reduces_symbol_exposure(risk_mgr):
+    # Over the 20% symbol limit at 30%; selling 20k brings it back to 10%
+    current_pos = [{"symbol": "AAPL", "market_value": 30000, "asset_class": "EQUITY"}]
+    is_valid, reason = risk_mgr.validate_order(
+        "AAPL", "EQUITY", "SELL", 100, 200, 100000, current_pos, {"GrossPositionValue": 30000}
+    )
+    assert is_valid, reason
+
 def test_leverage_limit(risk_mgr):
     # Gross value 220k on 100k portfolio (2.2x leverage, limit 2.0x)
     is_valid, reason = risk_mgr.validate_order(
@@ -64,3 +112,115 @@ def test_asset_class_limit(risk_mgr):
     )
     assert not is_valid
     assert "Asset class EQUITY exposure" in reason
+
+def test_sql_risk_metrics_match_numpy(risk_mgr, prices_db):
+    """In-database VaR, volatility and ES agree with the equivalent NumPy computation."""
+    weights = np.array([0.5, -0.2, 0.3])
+    portfolio_returns = prices_db.select(["AAPL", "MSFT", "GLD"]).fill_null(0.0).to_numpy() @ weights
+    cutoff = np.quantile(portfolio_returns, 0.05)
+
+    var = risk_mgr.calculate_portfolio_var(POSITIONS, 0.95)
+    vol = risk_mgr.calculate_portfolio_volatility(POSITIONS)
+    es = risk_mgr.calculate_expected_shortfall(POSITIONS, 0.95)
+
+    assert var == pytest.approx(abs(cutoff) * 100000)
+    assert vol == pytest.approx(portfolio_returns.std(ddof=1) * np.sqrt(252))
+    assert es == pytest.approx(abs(portfolio_returns[portfolio_returns <= cutoff].mean()) * 100000)
+
+def test_risk_queries_are_memoized(risk_mgr, prices_db, monkeypatch):
+    """A repeated risk refresh on an unchanged book does not hit the database again."""
+    first = risk_mgr.calculate_portfolio_volatility(POSITIONS)
+    monkeypatch.setattr(risk_engine, "get_settings", lambda: pytest.fail("query was not cached"))
+
+    assert risk_mgr.calculate_portfolio_volatility(POSITIONS) == first
+
+def test_limits_parsed_once_per_file_version(risk_mgr, monkeypatch):
+    """Re-creating a RiskManager reuses the parsed YAML until the file changes."""
+    path = risk_mgr.limits_path
+    monkeypatch.setattr(risk_engine.yaml, "load", lambda *a, **k: pytest.fail("limits re-parsed"))
+    assert RiskManager(limits_path=path).limits is risk_mgr.limits
+
+    monkeypatch.undo()
+    path.write_text("GLOBAL_LIMITS: {max_total_leverage: 3.0}")
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert RiskManager(limits_path=path).limits["GLOBAL_LIMITS"]["max_total_leverage"] == 3.0
+
+def test_fscore_snapshot_loaded_once(risk_mgr, monkeypatch):
+    """Safety checks read F-Scores from one snapshot load, not one query per order."""
+    db = MagicMock()
+    db.query.return_value = pl.DataFrame({"symbol": ["AAPL", "ZOMBIE"], "f_score": [8, 1]})
+    monkeypatch.setattr(risk_engine, "DuckDBManager", MagicMock(return_value=db))
+    monkeypatch.setattr(risk_engine, "get_settings", lambda: SimpleNamespace(duckdb_path="unused"))
+
+    assert risk_mgr._validate_asset_safety("AAPL", "STK")[0]
+    assert not risk_mgr._validate_asset_safety("ZOMBIE", "STK")[0]
+    assert risk_mgr._validate_asset_safety("UNRANKED", "STK")[0]
+    assert db.query.call_count == 1
+
+def test_concentration_groups_by_sector(risk_mgr, monkeypatch):
+    """Sector weights are grouped in Polars; symbols without metadata land in Unknown."""
+    db = MagicMock()
+    db.query.return_value = pl.DataFrame({"symbol": ["AAPL", "MSFT", "XOM"], "sector": ["Technology", "Technology", "Energy"]})
+    monkeypatch.setattr(risk_engine, "DuckDBManager", MagicMock(return_value=db))
+    monkeypatch.setattr(risk_engine, "get_settings", lambda: SimpleNamespace(duckdb_path="unused"))
+
+    sectors = risk_mgr.get_concentration_metrics(POSITIONS)["sectors"]
+    risk_mgr.get_concentration_metrics(POSITIONS)
+
+    assert [s["name"] for s in sectors] == ["Technology", "Unknown"]
+    assert sectors[0]["value"] == 70000 and sectors[0]["weight"] == pytest.approx(0.7)
+    assert db.query.call_count == 1
+
+def test_db_opened_once_across_threads(risk_mgr, monkeypatch):
+    """Concurrent first use of _db (main thread + executor) opens a single DuckDB connection."""
+    def slow_open(*args, **kwargs):
+        time.sleep(0.05)
+        return MagicMock()
+
+    opener = MagicMock(side_effect=slow_open)
+    monkeypatch.setattr(risk_engine, "DuckDBManager", opener)
+    monkeypatch.setattr(risk_engine, "get_settings", lambda: SimpleNamespace(duckdb_path="unused"))
+
+    seen = []
+    threads = [threading.Thread(target=lambda: seen.append(risk_mgr._db)) for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert opener.call_count == 1
+    assert all(db is seen[0] for db in seen)
+
+def test_position_asset_class_resolved_once(risk_mgr, monkeypatch):
+    """Untagged positions hit the registry once and are tagged for later validations."""
+    registry = MagicMock()
+    registry.get_asset_class.return_value = "EQUITY"
+    monkeypatch.setattr(risk_engine, "get_registry", lambda: registry)
+    positions = [{"symbol": "MSFT", "market_value": 20000}, {"symbol": "BTC", "market_value": 1000, "asset_class": "CRYPTO"}]
+
+    for _ in range(3):
+        assert risk_mgr.validate_order("AAPL", "EQUITY", "BUY", 10, 100, 100000, positions, {"GrossPositionValue": 0})[0]
+
+    assert positions[0]["asset_class"] == "EQUITY"
+    registry.get_asset_class.assert_called_once_with("MSFT")
+
+def test_stress_test_scenarios(risk_mgr):
+    """Market scenarios scale total equity; single-name scenarios shock that symbol's value."""
+    results = {r["scenario"]: r for r in risk_mgr.run_stress_test([{"symbol": "NVDA", "market_value": 40000}], 100000)}
+
+    assert results["Tech Sector Crash"]["impact_usd"] == pytest.approx(-15000)
+    assert results["Black Monday (1987)"]["status"] == "SEVERE"
+    assert results["NVDA Flash Crash"]["impact_usd"] == pytest.approx(-6000)
+    assert results["NVDA Flash Crash"]["impact_percent"] == pytest.approx(-0.06)
+    assert risk_mgr.run_stress_test([], 100000)[-1]["impact_usd"] == 0.0
+
+def test_position_book_matches_dict_positions(risk_mgr):
+    """Metrics accept a prebuilt PositionBook and give the same answers as the dict list."""
+    book = risk_engine.PositionBook.of(POSITIONS)
+
+    assert book.symbols == ["AAPL", "MSFT", "GLD"]
+    assert book.gross_value == 100000
+    assert risk_engine.PositionBook.of(book) is book
+    assert risk_mgr.get_portfolio_exposure(book, 100000) == risk_mgr.get_portfolio_exposure(POSITIONS, 100000)
+    assert risk_mgr.run_stress_test(book, 100000) == risk_mgr.run_stress_test(POSITIONS, 100000)
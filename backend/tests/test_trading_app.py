@@ -98,6 +98,60 @@ class TestTradingAppRiskValidation:
             assert result is False  # Should fail at 25% > 20%
 
 
+    def test_governance_lookup_is_rate_limited_and_expiry_halts(self):
+        """No strategy: governance is queried once per retry window. An expired one halts the app."""
+        from datetime import datetime, timedelta
+
+        from omega.trading_app import TradingApp
+
+        with patch.object(TradingApp, '__init__', lambda x, **kwargs: None):
+            app = TradingApp()
+            app._halted = False
+            app._strategy_retry_at = 0.0
+            app.active_strategy = None
+            app.gov = MagicMock()
+            app.gov.get_active_strategy.return_value = None
+
+            assert app._validate_risk("AAPL", 10, 100.0, "BUY") is False
+            assert app._validate_risk("AAPL", 10, 100.0, "BUY") is False
+            assert app.gov.get_active_strategy.call_count == 1
+
+            app._strategy_retry_at = 0.0
+            app.gov.get_active_strategy.return_value = {
+                "strategy_hash": "deadbeefcafe", "stage": "FULL", "ttl_expiry": datetime.now() - timedelta(seconds=1)
+            }
+            assert app._validate_risk("AAPL", 10, 100.0, "BUY") is False
+            assert app._halted is True
+
+    def test_assigned_strategy_carries_its_expiry_and_is_refreshed(self):
+        """Any assignment sets the deadline; an active strategy is re-read from governance after the refresh window."""
+        from datetime import datetime, timedelta
+
+        from omega.trading_app import TradingApp
+
+        with patch.object(TradingApp, '__init__', lambda x, **kwargs: None):
+            app = TradingApp()
+            app._halted = False
+            app.gov = MagicMock()
+
+            app.active_strategy = {"strategy_hash": "deadbeefcafe", "stage": "FULL", "ttl_expiry": datetime.now() - timedelta(seconds=1)}
+            assert app._validate_risk("AAPL", 10, 100.0, "BUY") is False
+            assert app._halted is True
+            app.gov.get_active_strategy.assert_not_called()
+
+            # Replacing it resets the deadline rather than inheriting the expired one
+            app._halted = False
+            app.active_strategy = {"strategy_hash": "feedface0000", "stage": "SHADOW", "ttl_expiry": datetime.now() + timedelta(days=1)}
+            assert app._validate_risk("AAPL", 10, 100.0, "BUY") is False
+            assert app._halted is False
+
+            # Once the refresh window passes, a revocation in governance takes effect
+            app._strategy_retry_at = 0.0
+            app.gov.get_active_strategy.return_value = None
+            assert app._validate_risk("AAPL", 10, 100.0, "BUY") is False
+            assert app.active_strategy is None
+            assert app.gov.get_active_strategy.call_count == 1
+
 class TestTradingAppOrders:
     """Test order-related methods."""
 
@@ -117,3 +171,127 @@ class TestTradingAppOrders:
         # Edge case: Should handle exactly 1.0 (100%)
         target_percent = 1.0
         assert 0.0 <= target_percent <= 1.0
+
+    def test_order_target_percent_fetches_state_once(self):
+        """Sizing and the risk gate share one account read and one quote."""
+        from datetime import datetime, timedelta
+
+        from omega.trading_app import TradingApp
+
+        with patch.object(TradingApp, '__init__', lambda x, **kwargs: None):
+            app = TradingApp()
+            app._halted = False
+            app._positions_cache = None
+            app._positions_index = {}
+            app._positions_ts = 0.0
+            app._account_cache = None
+            app._account_ts = 0.0
+            app._min_order_threshold = 100.0
+            app.paper_trading = True
+            app.active_strategy = {"stage": "LIVE", "ttl_expiry": datetime.now() + timedelta(days=1)}
+            app.metrics = {"order_latencies": [], "daily_pnl_initial_value": None}
+            app.registry = MagicMock()
+            app.risk_manager = MagicMock()
+            app.risk_manager.validate_spread.return_value = (True, "")
+            app.risk_manager.validate_order.return_value = (True, "")
+            app.broker = MagicMock()
+            app.broker.is_connected.return_value = True
+            app.broker.get_account_info.return_value = {"NetLiquidation": 100000.0}
+            app.broker.get_positions.return_value = []
+            app.broker.get_quote.return_value = {"bid": 99.9, "ask": 100.1, "last": 100.0}
+
+            app.order_target_percent("AAPL", 0.05)
+
+            app.broker.submit_order.assert_called_once_with("AAPL", 50, "BUY", "ADAPTIVE", 100.0)
+            assert app.broker.get_account_info.call_count == 1
+            assert app.broker.get_quote.call_count == 1
+
+            # A caller-supplied quote replaces the broker request for sizing and the spread check
+            app._invalidate_portfolio()
+            app.order_target_percent("AAPL", 0.10, quote={"bid": 99.9, "ask": 100.1, "last": 100.0})
+            assert app.broker.get_quote.call_count == 1
+            app.risk_manager.validate_spread.assert_called_with("AAPL", 99.9, 100.1)
+
+
+class TestTradingAppPositions:
+    """Test the short-lived positions cache."""
+
+    def test_get_position_reuses_one_broker_fetch(self):
+        """Lookups within the TTL share one broker call; an order forces a refetch."""
+        from omega.trading_app import TradingApp
+
+        with patch.object(TradingApp, '__init__', lambda x, **kwargs: None):
+            app = TradingApp()
+            app._positions_cache = None
+            app._positions_index = {}
+            app._positions_ts = 0.0
+            app._account_cache = None
+            app._account_ts = 0.0
+            app.registry = MagicMock()
+            app.broker = MagicMock()
+            app.broker.get_positions.side_effect = lambda: [
+                {"symbol": "AAPL", "market_value": 1000.0},
+                {"symbol": "MSFT", "market_value": 2000.0},
+            ]
+
+            assert app.get_position("AAPL")["market_value"] == 1000.0
+            assert app.get_position("MSFT")["market_value"] == 2000.0
+            assert app.get_position("TSLA") is None
+            assert app.broker.get_positions.call_count == 1
+
+            app._invalidate_portfolio()
+            app.get_position("AAPL")
+            assert app.broker.get_positions.call_count == 2
+
+    def test_account_info_reused_within_batch(self):
+        """Portfolio value and account reads share one broker call until an order lands."""
+        from omega.trading_app import TradingApp
+
+        with patch.object(TradingApp, '__init__', lambda x, **kwargs: None):
+            app = TradingApp()
+            app._account_cache = None
+            app._account_ts = 0.0
+            app._positions_cache = None
+            app.broker = MagicMock()
+            app.broker.get_account_info.return_value = {"NetLiquidation": 50000.0}
+
+            assert app.get_portfolio_value() == 50000.0
+            assert app.get_account_info()["NetLiquidation"] == 50000.0
+            assert app.broker.get_account_info.call_count == 1
+
+            app._invalidate_portfolio()
+            app.get_portfolio_value()
+            assert app.broker.get_account_info.call_count == 2
+
+
+class TestTradingAppHealth:
+    """Test the control-plane health status."""
+
+    def test_health_latency_percentiles_in_ms(self):
+        """Latencies are stored as integer ns and reported in ms; reads between orders reuse the result."""
+        from collections import deque
+
+        from omega.trading_app import TradingApp
+
+        with patch.object(TradingApp, '__init__', lambda x, **kwargs: None):
+            app = TradingApp()
+            app._halted = False
+            app._positions_cache = None
+            app._positions_index = {}
+            app._positions_ts = 0.0
+            app._account_cache = None
+            app._account_ts = 0.0
+            app._latency_percentiles = None
+            app.aggregators = {}
+            app.registry = MagicMock()
+            app.risk_manager = MagicMock()
+            app.broker = MagicMock()
+            app.broker.get_positions.return_value = []
+            app.broker.get_account_info.return_value = {"NetLiquidation": 100000.0, "DailyPnL": 0.0}
+            app.metrics = {"order_latencies": deque([1_000_000, 3_000_000], maxlen=1024), "daily_pnl_initial_value": None}
+
+            status = app.get_health_status()
+            assert status["latency_p50_ms"] == 2.0
+
+            app.metrics["order_latencies"].append(10_000_000)
+            assert app.get_health_status()["latency_p50_ms"] == 2.0